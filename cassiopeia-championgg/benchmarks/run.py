@@ -0,0 +1,343 @@
+"""Times the plugin's main code paths against a local stand-in for champion.gg and writes the results as JSON.
+
+    python benchmarks/run.py --output results.json
+    python benchmarks/run.py --compare results.json
+
+Every benchmark runs `--repeat` times after `--warmup` untimed runs. "Cold" benchmarks start each repetition with a
+new data source, so they include the requests to the stand-in server. Payloads are synthetic unless `--payloads` names
+a directory of recorded responses (see `standin.Payloads.load`). With `--compare`, the median of each benchmark is
+compared with a previous results file and the exit status is 1 if any is more than `--threshold` times slower.
+"""
+from typing import Any, Callable, Dict, List, Tuple
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datapipelines import DataPipeline
+
+import cassiopeia
+from cassiopeia.core.patch import Patch
+
+from cassiopeia_championgg import ChampionGGChampion, ChampionGGChampions, ChampionGGTransformer
+from cassiopeia_championgg.data import Role
+from cassiopeia_championgg.datastores import ChampionGG
+from cassiopeia_championgg.dto import ChampionGGStatsListDto, ChampionGGStatsDto, MultipleChampionGGStatsDto, ChampionGGMatchupListDto
+from cassiopeia_championgg.snapshot import Snapshot, write_snapshot
+
+from standin import Payloads, StandInServer
+
+PATCH = "8.1"
+# No rate limiting against the stand-in
+UNLIMITED = [(1, 10 ** 9)]
+# The number of matchup lists requested in each repetition of the matchup benchmarks
+MATCHUP_LISTS = 10
+
+BENCHMARKS = []
+
+
+def add(name: str, function: Callable[[Any], Any], setup: Callable[["Environment"], Any] = None, operations: int = 1) -> None:
+    """Adds the benchmark `function(state)`. `setup(environment)`, if given, is called before every repetition and its
+    result is passed to `function`, untimed. `operations` is the number of requests or conversions in one call."""
+    BENCHMARKS.append((name, operations, setup, function))
+
+
+class Environment(object):
+    def __init__(self, server: StandInServer) -> None:
+        self.server = server
+        self.transformer = ChampionGGTransformer()
+        rows = sorted(server.payloads.champions, key=lambda row: (row["championId"], row["role"]))
+        self.champion_roles = [(row["championId"], row["role"]) for row in rows]
+        self.champion_ids = server.payloads.champion_ids
+        self.middle = next(id for id, role in self.champion_roles if role == Role.middle.value)
+        self.matchup_roles = [(id, role) for id, role in self.champion_roles if role != "DUO_SUPPORT"][:MATCHUP_LISTS]
+        # Also stops Cassiopeia printing every request
+        self.apply_settings()
+
+    def source(self) -> ChampionGG:
+        return ChampionGG("CHAMPIONGG_KEY", api_url=self.server.url, rate_limits=UNLIMITED)
+
+    def pipeline(self, source: ChampionGG = None) -> DataPipeline:
+        return DataPipeline([source or self.source()], [self.transformer])
+
+    def loaded_pipeline(self) -> DataPipeline:
+        pipeline = self.pipeline()
+        pipeline.get(ChampionGGStatsListDto, {"patch": PATCH})
+        for id, role in self.matchup_roles:
+            pipeline.get(ChampionGGMatchupListDto, {"id": id, "role": role, "patch": PATCH})
+        return pipeline
+
+    def apply_settings(self) -> None:
+        # The README's configuration, with only the data sources that don't need a network connection
+        cassiopeia.apply_settings({
+            "pipeline": {
+                "Cache": {},
+                "ChampionGG": {"package": "cassiopeia_championgg", "api_key": "CHAMPIONGG_KEY", "api_url": self.server.url, "rate_limits": UNLIMITED}
+            },
+            "logging": {"print_calls": False}
+        })
+
+    @staticmethod
+    def patch() -> Patch:
+        # As `Champion.championgg` makes it when the patch isn't known
+        return Patch(region="NA", season=None, name=PATCH, start=None, end=None)
+
+
+def _read_matchups(champion: ChampionGGChampion) -> float:
+    return sum(matchup.winrate for matchup in champion[Role.middle].matchups)
+
+
+# get_gg_champion_list
+
+def _champion_list(pipeline: DataPipeline) -> None:
+    pipeline.get(ChampionGGStatsListDto, {"patch": PATCH})
+
+add("get_gg_champion_list/cold", _champion_list, setup=Environment.pipeline)
+add("get_gg_champion_list/cached", _champion_list, setup=Environment.loaded_pipeline)
+
+
+# get_one_champion_from_list
+
+def _setup_champion_roles(environment: Environment) -> Tuple[DataPipeline, List[Tuple[int, str]]]:
+    return environment.loaded_pipeline(), environment.champion_roles
+
+def _champion_roles(state: Tuple[DataPipeline, List[Tuple[int, str]]]) -> None:
+    pipeline, champion_roles = state
+    for id, role in champion_roles:
+        pipeline.get(ChampionGGStatsDto, {"id": id, "role": role, "patch": PATCH})
+
+def _setup_champions(environment: Environment) -> Tuple[DataPipeline, List[int]]:
+    return environment.loaded_pipeline(), environment.champion_ids
+
+def _champions(state: Tuple[DataPipeline, List[int]]) -> None:
+    pipeline, champion_ids = state
+    for id in champion_ids:
+        pipeline.get(MultipleChampionGGStatsDto, {"id": id, "patch": PATCH})
+
+add("get_one_champion_from_list/role/cached", _champion_roles, setup=_setup_champion_roles)
+add("get_one_champion_from_list/champion/cached", _champions, setup=_setup_champions)
+
+
+# get_championgg_matchups
+
+def _setup_matchups(environment: Environment) -> Tuple[DataPipeline, List[Tuple[int, str]]]:
+    return environment.pipeline(), environment.matchup_roles
+
+def _setup_cached_matchups(environment: Environment) -> Tuple[DataPipeline, List[Tuple[int, str]]]:
+    return environment.loaded_pipeline(), environment.matchup_roles
+
+def _matchups(state: Tuple[DataPipeline, List[Tuple[int, str]]]) -> None:
+    pipeline, champion_roles = state
+    for id, role in champion_roles:
+        pipeline.get(ChampionGGMatchupListDto, {"id": id, "role": role, "patch": PATCH})
+
+def _setup_many_matchups(environment: Environment) -> Tuple[ChampionGG, List[Tuple[int, str]]]:
+    return environment.source(), environment.matchup_roles
+
+def _many_matchups(state: Tuple[ChampionGG, List[Tuple[int, str]]]) -> None:
+    source, champion_roles = state
+    source.get_many_matchups(champion_roles, patch=PATCH)
+
+add("get_championgg_matchups/cold", _matchups, setup=_setup_matchups, operations=MATCHUP_LISTS)
+add("get_championgg_matchups/cached", _matchups, setup=_setup_cached_matchups, operations=MATCHUP_LISTS)
+add("get_many_matchups/cold", _many_matchups, setup=_setup_many_matchups, operations=MATCHUP_LISTS)
+
+
+# transformers.py
+
+def _setup_stats_dtos(environment: Environment) -> Tuple[ChampionGGTransformer, List[ChampionGGStatsDto]]:
+    ggs = environment.loaded_pipeline().get(ChampionGGStatsListDto, {"patch": PATCH})
+    return environment.transformer, [ChampionGGStatsDto(row) for row in ggs["data"]]
+
+def _stats_dto_to_data(state: Tuple[ChampionGGTransformer, List[ChampionGGStatsDto]]) -> None:
+    transformer, dtos = state
+    for dto in dtos:
+        transformer.champion_gg_dto_to_data(dto)
+
+def _setup_multiple_stats_dtos(environment: Environment) -> Tuple[ChampionGGTransformer, List[MultipleChampionGGStatsDto]]:
+    pipeline = environment.loaded_pipeline()
+    return environment.transformer, [pipeline.get(MultipleChampionGGStatsDto, {"id": id, "patch": PATCH}) for id in environment.champion_ids]
+
+def _multiple_stats_dto_to_data(state: Tuple[ChampionGGTransformer, List[MultipleChampionGGStatsDto]]) -> None:
+    transformer, dtos = state
+    for dto in dtos:
+        transformer.muliple_champion_gg_dto_to_data(dto)
+
+def _setup_matchup_dtos(environment: Environment) -> Tuple[ChampionGGTransformer, List[ChampionGGMatchupListDto]]:
+    pipeline = environment.loaded_pipeline()
+    return environment.transformer, [pipeline.get(ChampionGGMatchupListDto, {"id": id, "role": role, "patch": PATCH}) for id, role in environment.matchup_roles]
+
+def _matchup_dto_to_core(state: Tuple[ChampionGGTransformer, List[ChampionGGMatchupListDto]]) -> None:
+    transformer, dtos = state
+    for dto in dtos:
+        matchups = transformer.championgg_matchups_data_to_core(transformer.championgg_matchup_list_dto_to_data(dto))
+        for matchup in matchups:
+            matchup.winrate
+
+def _setup_stats_list_dto(environment: Environment) -> Tuple[ChampionGGTransformer, ChampionGGStatsListDto]:
+    return environment.transformer, environment.loaded_pipeline().get(ChampionGGStatsListDto, {"patch": PATCH})
+
+def _stats_list_dto_to_data(state: Tuple[ChampionGGTransformer, ChampionGGStatsListDto]) -> None:
+    transformer, dto = state
+    transformer.champion_gg_list_dto_to_data(dto)
+
+add("transformers/champion_gg_dto_to_data", _stats_dto_to_data, setup=_setup_stats_dtos)
+add("transformers/champion_gg_list_dto_to_data", _stats_list_dto_to_data, setup=_setup_stats_list_dto)
+add("transformers/muliple_champion_gg_dto_to_data", _multiple_stats_dto_to_data, setup=_setup_multiple_stats_dtos)
+add("transformers/matchup_list_dto_to_core", _matchup_dto_to_core, setup=_setup_matchup_dtos, operations=MATCHUP_LISTS)
+
+
+# The README's `lux.championgg[Role.middle].matchups`, from the ChampionGGChampion that `championgg` returns (getting
+# `lux` itself needs Riot's API)
+
+def _setup_readme(environment: Environment) -> ChampionGGChampion:
+    environment.apply_settings()
+    return ChampionGGChampion(id=environment.middle, patch=environment.patch())
+
+def _setup_readme_cached(environment: Environment) -> ChampionGGChampion:
+    _read_matchups(_setup_readme(environment))
+    return ChampionGGChampion(id=environment.middle, patch=environment.patch())
+
+add("readme/championgg_middle_matchups/cold", _read_matchups, setup=_setup_readme)
+add("readme/championgg_middle_matchups/cached", _read_matchups, setup=_setup_readme_cached)
+
+
+# Every champion's ChampionGGChampion from a cached champion list, loaded one at a time and all at once
+
+def _setup_all_champions(environment: Environment) -> List[ChampionGGChampion]:
+    environment.apply_settings()
+    cassiopeia.configuration.settings.pipeline.get(ChampionGGStatsListDto, {"patch": PATCH})
+    patch = environment.patch()
+    return [ChampionGGChampion(id=id, patch=patch) for id in environment.champion_ids]
+
+def _load_each(champions: List[ChampionGGChampion]) -> None:
+    for champion in champions:
+        champion.load()
+
+add("champions/load/cached", _load_each, setup=_setup_all_champions)
+add("champions/load_many/cached", ChampionGGChampion.load_many, setup=_setup_all_champions)
+
+def _setup_champion_collection(environment: Environment) -> ChampionGGChampions:
+    _setup_all_champions(environment)
+    return ChampionGGChampions(patch=environment.patch())
+
+add("champions/ChampionGGChampions/cached", ChampionGGChampions.load, setup=_setup_champion_collection)
+
+
+# snapshot.py, reading back every list written from a loaded data source. Setting up checks that each list comes back
+# unchanged, down to the type of each value, including one whose field changes shape and numeric type from row to row.
+
+def _setup_snapshot(environment: Environment) -> Snapshot:
+    pipeline = environment.loaded_pipeline()
+    ggs = pipeline.get(ChampionGGStatsListDto, {"patch": PATCH})
+    shapes = [None, 1, "one", {"a": 1}, {"a": {"b": [1, 2]}}, {}, 0.5, 2 ** 70]
+    mixed = ChampionGGStatsListDto(ggs, fields=["mixed"], data=[dict(row, mixed=shapes[i % len(shapes)]) for i, row in enumerate(ggs["data"])])
+    entries = [(ChampionGGStatsListDto, ggs), (ChampionGGStatsListDto, mixed)]
+    entries += [(ChampionGGMatchupListDto, pipeline.get(ChampionGGMatchupListDto, {"id": id, "role": role, "patch": PATCH})) for id, role in environment.matchup_roles]
+    path = os.path.join(tempfile.mkdtemp(), "snapshot.bin")
+    write_snapshot(path, entries)
+    snapshot = Snapshot(path)
+    for type, dto in entries:
+        key = (dto["patch"], dto["elo"], tuple(dto["fields"])) if type is ChampionGGStatsListDto else (dto["id"], dto["patch"], dto["elo"], dto["role"])
+        if json.dumps(snapshot.get(type, key), sort_keys=True) != json.dumps(dto, sort_keys=True):
+            raise AssertionError("{} {} changed when written to a snapshot and read back".format(type.__name__, key))
+    return snapshot
+
+def _snapshot_get(snapshot: Snapshot) -> None:
+    for type, key in snapshot.keys():
+        snapshot.get(type, key)
+
+add("snapshot/get", _snapshot_get, setup=_setup_snapshot, operations=2 + MATCHUP_LISTS)
+
+
+def run(environment: Environment, repeat: int, warmup: int = 1, only: str = None) -> List[Dict[str, Any]]:
+    results = []
+    for name, operations, setup, function in BENCHMARKS:
+        if only is not None and only not in name:
+            continue
+        times = []
+        for repetition in range(warmup + repeat):
+            state = setup(environment) if setup is not None else None
+            start = time.perf_counter()
+            function(state)
+            if repetition >= warmup:
+                times.append(time.perf_counter() - start)
+        results.append({
+            "name": name,
+            "operations": operations,
+            "repeat": repeat,
+            "min": min(times),
+            "median": statistics.median(times),
+            "mean": statistics.mean(times),
+            "stdev": statistics.stdev(times) if len(times) > 1 else 0.0,
+            "times": times
+        })
+        print("{:<50} {:>10.3f} ms".format(name, 1000 * statistics.median(times)), file=sys.stderr)
+    return results
+
+
+def compare(results: List[Dict[str, Any]], baseline: Dict[str, Any], threshold: float) -> bool:
+    """Prints each benchmark's median relative to `baseline` and returns whether none regressed past `threshold`."""
+    medians = {result["name"]: result["median"] for result in baseline["benchmarks"]}
+    ok = True
+    for result in results:
+        if result["name"] not in medians:
+            continue
+        ratio = result["median"] / medians[result["name"]]
+        regressed = ratio > threshold
+        ok = ok and not regressed
+        print("{:<50} {:>6.2f}x{}".format(result["name"], ratio, "  REGRESSED" if regressed else ""), file=sys.stderr)
+    return ok
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--warmup", type=int, default=1, help="Untimed repetitions to run before the timed ones")
+    parser.add_argument("--champions", type=int, default=140, help="The number of champions in the synthetic payloads")
+    parser.add_argument("--payloads", help="A directory of recorded payloads to serve instead of synthetic ones")
+    parser.add_argument("--only", help="Only run benchmarks whose names contain this")
+    parser.add_argument("--output", help="Write the results to this file instead of stdout")
+    parser.add_argument("--compare", help="A previous results file to compare against")
+    parser.add_argument("--threshold", type=float, default=1.25)
+    args = parser.parse_args()
+
+    if args.payloads is not None:
+        payloads = Payloads.load(args.payloads)
+    else:
+        payloads = Payloads.synthetic(champions=args.champions)
+    with StandInServer(payloads) as server:
+        results = run(Environment(server), repeat=args.repeat, warmup=args.warmup, only=args.only)
+        requests = server.requests
+
+    report = {
+        "created": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "payloads": args.payloads or "synthetic:{}".format(args.champions),
+        "requests": requests,
+        "benchmarks": results
+    }
+    if args.output is not None:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+    if args.compare is not None:
+        with open(args.compare) as f:
+            if not compare(results, json.load(f), args.threshold):
+                return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
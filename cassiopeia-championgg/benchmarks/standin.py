@@ -0,0 +1,204 @@
+"""A local stand-in for the champion.gg API that serves recorded or synthetic payloads.
+
+Point a `ChampionGG` data source at it with `api_url=server.url`.
+"""
+from typing import Dict, List, Tuple
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Lock, Thread
+from urllib.parse import urlsplit, parse_qs
+import gzip
+import hashlib
+import json
+import os
+import random
+import re
+
+ROLES = ["TOP", "JUNGLE", "MIDDLE", "DUO_CARRY", "DUO_SUPPORT"]
+MATCHUP_ROLES = ["TOP", "JUNGLE", "MIDDLE", "DUO_CARRY", "ADCSUPPORT", "SYNERGY"]
+# Fields every row of the champion list has, whatever `champData` was requested
+LIST_KEYS = {"_id", "championId", "role", "elo", "patch"}
+
+
+class Payloads(object):
+    """The champion list and matchup lists the stand-in serves.
+
+    `Payloads.synthetic` generates lists shaped like champion.gg's. `Payloads.load` reads recorded responses from a
+    directory holding `champions.json` (the champion list, with every `champData` field) and `matchups/<id>-<role>.json`
+    files; matchup lists that weren't recorded are generated.
+    """
+    def __init__(self, champions: List[dict], matchups: Dict[Tuple[int, str], List[dict]] = None, seed: int = 0) -> None:
+        self.champions = champions
+        self.champion_ids = sorted({row["championId"] for row in champions})
+        self.matchups = matchups or {}
+        self._seed = seed
+
+    @classmethod
+    def synthetic(cls, champions: int = 140, patch: str = "8.1", elo: str = "PLATINUM_DIAMOND_MASTER_CHALLENGER", seed: int = 0) -> "Payloads":
+        generator = random.Random(seed)
+        rows = []
+        for id in range(1, champions + 1):
+            for role in generator.sample(ROLES, generator.choice([1, 1, 2, 2, 3])):
+                rows.append({
+                    "_id": {"championId": id, "role": role},
+                    "championId": id,
+                    "role": role,
+                    "elo": elo,
+                    "patch": patch,
+                    "winRate": generator.uniform(0.42, 0.56),
+                    "playRate": generator.uniform(0.001, 0.2),
+                    "percentRolePlayed": generator.random(),
+                    "banRate": generator.uniform(0, 0.3),
+                    "kda": generator.uniform(1.5, 4),
+                    "minions": generator.uniform(10, 200),
+                    "goldEarned": generator.uniform(8000, 14000),
+                    "totalHeal": generator.uniform(500, 8000),
+                    "gamesPlayed": generator.randint(100, 50000),
+                    "damage": {"total": generator.uniform(1e4, 3e4), "totalMagical": generator.uniform(0, 2e4), "totalPhysical": generator.uniform(0, 2e4), "totalTrue": generator.uniform(0, 2e3)},
+                    "hashes": {
+                        name: {
+                            "highestCount": {"count": generator.randint(10, 5000), "winrate": generator.random(), "hash": "-".join(str(generator.randint(1000, 4000)) for _ in range(6))},
+                            "highestWinrate": {"count": generator.randint(10, 5000), "winrate": generator.random(), "hash": "-".join(str(generator.randint(1000, 4000)) for _ in range(6))}
+                        }
+                        for name in ("finalitemshashfixed", "firstitemshash", "runehash", "skillorderhash", "summonershash", "trinkethash", "evolveskillorder")
+                    }
+                })
+        return cls(rows, seed=seed)
+
+    @classmethod
+    def load(cls, path: str, seed: int = 0) -> "Payloads":
+        with open(os.path.join(path, "champions.json")) as f:
+            champions = json.load(f)
+        matchups = {}
+        directory = os.path.join(path, "matchups")
+        if os.path.isdir(directory):
+            for name in os.listdir(directory):
+                match = re.fullmatch(r"(\d+)-(\w+)\.json", name)
+                if match:
+                    with open(os.path.join(directory, name)) as f:
+                        matchups[(int(match.group(1)), match.group(2))] = json.load(f)
+        return cls(champions, matchups, seed=seed)
+
+    def champion_list(self, fields: List[str], elo: str, limit: int, skip: int) -> List[dict]:
+        keys = LIST_KEYS | set(fields)
+        rows = sorted(self.champions, key=lambda row: -row.get("winRate", 0))[skip:skip + limit]
+        return [{key: value for key, value in row.items() if key in keys} for row in rows]
+
+    def matchup_list(self, id: int, role: str, elo: str) -> List[dict]:
+        try:
+            return self.matchups[(id, role)]
+        except KeyError:
+            pass
+        generator = random.Random("{}-{}-{}".format(self._seed, id, role))
+        rows = []
+        for enemy in self.champion_ids:
+            if enemy == id:
+                continue
+            champ1, champ2 = (id, enemy) if id < enemy else (enemy, id)
+            sides = {}
+            for side in ("champ1", "champ2"):
+                sides[side] = {
+                    "wins": generator.randint(0, 400),
+                    "winrate": generator.random(),
+                    "kills": generator.uniform(2, 10),
+                    "deaths": generator.uniform(2, 10),
+                    "assists": generator.uniform(2, 12),
+                    "goldEarned": generator.uniform(8000, 14000),
+                    "totalDamageDealtToChampions": generator.uniform(1e4, 3e4),
+                    "minionsKilled": generator.uniform(10, 200),
+                    "killingSprees": generator.uniform(0, 2),
+                    "weighedScore": generator.uniform(0, 1e5),
+                    "deltaweighedScore": generator.uniform(-1e3, 1e3),
+                    "duoRole": role
+                }
+            rows.append({
+                "_id": {"champ1_id": champ1, "champ2_id": champ2, "role": role},
+                "count": sides["champ1"]["wins"] + sides["champ2"]["wins"],
+                "champ1_id": champ1,
+                "champ2_id": champ2,
+                "champ1": sides["champ1"],
+                "champ2": sides["champ2"]
+            })
+        return rows
+
+
+class StandInServer(object):
+    """Serves `payloads` from `url` on a local port, gzipped and with ETags, the way champion.gg does.
+
+    Encoded responses are kept so repeated requests measure the client rather than the server. `requests` counts the
+    requests served.
+    """
+    def __init__(self, payloads: Payloads, host: str = "127.0.0.1", port: int = 0) -> None:
+        self.payloads = payloads
+        self.requests = 0
+        self._lock = Lock()
+        self._responses = {}
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self) -> None:
+                server._respond(self)
+
+            def log_message(self, format: str, *args) -> None:
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self._thread = Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return "http://{host}:{port}/v2".format(host=host, port=port)
+
+    def __enter__(self) -> "StandInServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _body(self, path: str, query: Dict[str, str]) -> List[dict]:
+        elo = query.get("elo", "PLATINUM_DIAMOND_MASTER_CHALLENGER")
+        match = re.fullmatch(r"/v2/champions/(\d+)/(\w+)/matchups", path)
+        if match:
+            return self.payloads.matchup_list(int(match.group(1)), match.group(2), elo)
+        if path == "/v2/champions":
+            fields = query.get("champData", "").split(",")
+            return self.payloads.champion_list(fields, elo, limit=int(query.get("limit", 500)), skip=int(query.get("skip", 0)))
+        raise KeyError(path)
+
+    def _respond(self, request: BaseHTTPRequestHandler) -> None:
+        with self._lock:
+            self.requests += 1
+        url = urlsplit(request.path)
+        key = (url.path, tuple(sorted((name, tuple(values)) for name, values in parse_qs(url.query).items() if name != "api_key")))
+        try:
+            response = self._responses[key]
+        except KeyError:
+            try:
+                body = json.dumps(self._body(url.path, {name: values[0] for name, values in parse_qs(url.query).items()})).encode("utf-8")
+            except KeyError:
+                request.send_response(404)
+                request.send_header("Content-Length", "0")
+                request.end_headers()
+                return
+            response = (gzip.compress(body), '"{}"'.format(hashlib.sha1(body).hexdigest()))
+            self._responses[key] = response
+
+        body, etag = response
+        if request.headers.get("If-None-Match") == etag:
+            request.send_response(304)
+            request.send_header("ETag", etag)
+            request.send_header("Content-Length", "0")
+            request.end_headers()
+            return
+        request.send_response(200)
+        request.send_header("Content-Type", "application/json; charset=utf-8")
+        request.send_header("Content-Encoding", "gzip")
+        request.send_header("ETag", etag)
+        request.send_header("Content-Length", str(len(body)))
+        request.end_headers()
+        request.wfile.write(body)
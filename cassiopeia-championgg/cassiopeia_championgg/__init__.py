@@ -1,33 +1,79 @@
+from typing import Iterable, List, Set, Union
+
 from merakicommons.cache import lazy_property
 
 import cassiopeia
 from cassiopeia.core.common import get_latest_version
 from cassiopeia.core.staticdata.champion import Champion
 from cassiopeia.core.patch import Patch
-from .core import ChampionGGChampion
+from cassiopeia.data import Region
+from .core import ChampionGGChampion, ChampionGGChampions
 from .datastores import ChampionGG
+from .async_datastores import AsyncChampionGG
 from .transformers import ChampionGGTransformer
+from .table import ChampionGGStatsTable, ChampionGGEloTable
+from .matrix import ChampionGGMatchupMatrix
+from .instrumentation import Metrics, metrics
+from .ratelimits import AdaptiveRateLimiter
+from .snapshot import Snapshot, write_snapshot
+from .history import ChampionGGHistory
 from .data import Role
 
 __transformers__ = [ChampionGGTransformer()]
 
 # Monkey patch in the Champion.championgg object
 
-def championgg(self) -> ChampionGGChampion:
-    """The champion.gg data for this champion."""
-    latest_version = get_latest_version(self.region, endpoint="champion")
-    if self.version != latest_version:
+def _championgg_patch(region: Region, version: str) -> Patch:
+    latest_version = get_latest_version(region, endpoint="champion")
+    if version != latest_version:
         raise ValueError("Can only get champion.gg data for champions on the most recent version.")
-    patch_name = ".".join(self.version.split(".")[:-1])
+    patch_name = ".".join(version.split(".")[:-1])
     try:
-        patch = Patch.from_str(patch_name, region=self.region)
+        return Patch.from_str(patch_name, region=region)
     except ValueError:
-        patch = Patch(region=self.region, season=None, name=patch_name, start=None, end=None)
-    return ChampionGGChampion(id=self.id, patch=patch, region=self.region)
+        return Patch(region=region, season=None, name=patch_name, start=None, end=None)
+
+
+def championgg(self) -> ChampionGGChampion:
+    """The champion.gg data for this champion."""
+    return ChampionGGChampion(id=self.id, patch=_championgg_patch(self.region, self.version), region=self.region)
 
 championgg = lazy_property(championgg)
 
 Champion.championgg = championgg
 
+
+def load_championgg(champions: Iterable[Union[Champion, int]], region: Union[Region, str] = None, elo: Set[str] = None, fields: Set[str] = None) -> List[ChampionGGChampion]:
+    """Returns the loaded champion.gg data for many champions at once, in order.
+
+    `champions` can be cassiopeia `Champions`, `Champion`s, or champion ids, which are looked up on `region`'s latest
+    version. The patch is resolved once per region and version, and each champion list is scanned once for all of
+    the champions, rather than once per champion. Each `Champion`'s `championgg` is set to its result.
+    """
+    if region is None:
+        region = cassiopeia.configuration.settings.default_region
+    if region is not None and not isinstance(region, Region):
+        region = Region(region)
+    patches = {}
+    results = []
+    for champion in champions:
+        if isinstance(champion, Champion):
+            key = (champion.region, champion.version)
+        else:
+            key = (region, None)
+        try:
+            patch = patches[key]
+        except KeyError:
+            version = key[1] if key[1] is not None else get_latest_version(key[0], endpoint="champion")
+            patch = patches[key] = _championgg_patch(key[0], version)
+        if isinstance(champion, Champion):
+            result = ChampionGGChampion(id=champion.id, patch=patch, elo=elo, region=champion.region, fields=fields)
+            Champion.championgg.fget._lazy_set(champion, result)
+        else:
+            result = ChampionGGChampion(id=champion, patch=patch, elo=elo, region=region, fields=fields)
+        results.append(result)
+    ChampionGGChampion.load_many(results)
+    return results
+
 # Monkey patch in the Role as well
 cassiopeia.RoleGG = Role
@@ -0,0 +1,60 @@
+from typing import Any, Callable, Iterable, List, Tuple, TypeVar
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import functools
+
+from cassiopeia.datastores.common import HTTPClient
+
+from .dto import ChampionGGStatsListDto, ChampionGGStatsDto, ChampionGGMatchupListDto, MultipleChampionGGStatsDto
+from .datastores import ChampionGG
+from .table import ChampionGGEloTable
+
+T = TypeVar("T")
+
+
+class AsyncChampionGG(object):
+    """An asyncio interface to the champion.gg API.
+
+    Requests are run on a pool of worker threads so they never block the event loop. All requests go through the
+    wrapped `ChampionGG` data source, so they share its cache and its rate limiters: many matchup lists can be
+    requested at once, and the rate limiters hold back any request that would exceed champion.gg's limits.
+    """
+    def __init__(self, datasource: ChampionGG = None, *, api_key: str = None, http_client: HTTPClient = None, max_concurrent_requests: int = 10, **kwargs) -> None:
+        if datasource is None:
+            datasource = ChampionGG(api_key, http_client=http_client, **kwargs)
+        self._datasource = datasource
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrent_requests)
+
+    @property
+    def datasource(self) -> ChampionGG:
+        return self._datasource
+
+    async def _run(self, function: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(function, *args, **kwargs))
+
+    async def get_champion_list(self, patch: str, elo: str = "PLATINUM_DIAMOND_MASTER_CHALLENGER", fields: Iterable[str] = None) -> ChampionGGStatsListDto:
+        return await self._run(self._datasource.fetch_champion_list, patch=patch, elo=elo, fields=fields)
+
+    async def get_champion(self, id: int, patch: str, elo: str = "PLATINUM_DIAMOND_MASTER_CHALLENGER", fields: Iterable[str] = None) -> MultipleChampionGGStatsDto:
+        ggs = await self.get_champion_list(patch=patch, elo=elo, fields=fields)
+        return self._datasource.find_champion(ggs, id)
+
+    async def get_champion_role(self, id: int, role: str, patch: str, elo: str = "PLATINUM_DIAMOND_MASTER_CHALLENGER", fields: Iterable[str] = None) -> ChampionGGStatsDto:
+        ggs = await self.get_champion_list(patch=patch, elo=elo, fields=fields)
+        return self._datasource.find_champion_role(ggs, id, role)
+
+    async def get_elo_table(self, patch: str, elos: Iterable[str] = None, fields: Iterable[str] = None) -> ChampionGGEloTable:
+        """Requests the champion list for each of `elos` (by default, every elo) concurrently and merges them into one table."""
+        return await self._run(self._datasource.get_elo_table, patch, elos=elos, fields=fields)
+
+    async def get_matchups(self, id: int, role: str, patch: str, elo: str = "PLATINUM_DIAMOND_MASTER_CHALLENGER") -> ChampionGGMatchupListDto:
+        data = await self._run(self._datasource.fetch_matchups, id=id, patch=patch, elo=elo, role=role)
+        return ChampionGGMatchupListDto(data)
+
+    async def get_many_matchups(self, champion_roles: Iterable[Tuple[int, str]], patch: str, elo: str = "PLATINUM_DIAMOND_MASTER_CHALLENGER") -> List[ChampionGGMatchupListDto]:
+        """Requests the matchups for each `(champion id, role)` pair concurrently and returns them in the same order."""
+        return await asyncio.gather(*[self.get_matchups(id=id, role=role, patch=patch, elo=elo) for id, role in champion_roles])
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False)
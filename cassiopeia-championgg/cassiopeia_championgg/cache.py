@@ -0,0 +1,325 @@
+from typing import Any, Callable, Hashable, List, Mapping, Tuple
+from collections import OrderedDict
+from threading import Event, Lock, RLock
+import datetime
+import os
+import sqlite3
+import sys
+import time
+
+try:
+    import ujson as json
+except ImportError:
+    import json
+
+
+def estimate_size(value: Any) -> int:
+    """Roughly estimates the number of bytes held by a tree of dicts, lists and scalars."""
+    size = 0
+    stack = [value]
+    seen = set()
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        size += sys.getsizeof(obj)
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack.extend(obj)
+    return size
+
+
+class ChampionGGCache(object):
+    """A least-recently-used cache bounded by entry count and estimated size in bytes.
+
+    Keys are `(type, key)` tuples. The expiration for an entry is looked up by its type in `expirations`, in seconds
+    (or as a `datetime.timedelta`); -1 or a missing type means the entry never expires. `on_evict(key, value)` is
+    called for each entry that is evicted to stay within the limits or that is found to have expired.
+    """
+    def __init__(self, max_entries: int = None, max_bytes: int = None, expirations: Mapping[type, float] = None, on_evict: Callable[[Tuple[type, Hashable], Any], None] = None) -> None:
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._expirations = {}
+        for type, expiration in (expirations or {}).items():
+            if isinstance(expiration, datetime.timedelta):
+                expiration = expiration.total_seconds()
+            self._expirations[type] = expiration
+        self._on_evict = on_evict
+
+        self._entries = OrderedDict()  # key -> (value, size, expires_at)
+        self._lock = RLock()
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def expiration(self, type: type) -> float:
+        expiration = self._expirations.get(type, None)
+        if expiration is None:
+            expiration = self._expirations.get(getattr(type, "__name__", None), -1)
+        return expiration
+
+    def __getitem__(self, key: Tuple[type, Hashable]) -> Any:
+        with self._lock:
+            try:
+                value, size, expires_at = self._entries[key]
+            except KeyError:
+                self._misses += 1
+                raise
+            if expires_at is not None and expires_at <= time.monotonic():
+                self._remove(key)
+                self._misses += 1
+                if self._on_evict is not None:
+                    self._on_evict(key, value)
+                raise KeyError(key)
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return value
+
+    def __setitem__(self, key: Tuple[type, Hashable], value: Any) -> None:
+        expiration = self.expiration(key[0])
+        if expiration == 0:
+            return
+        expires_at = None if expiration == -1 else time.monotonic() + expiration
+        size = estimate_size(value)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, size, expires_at)
+            self._bytes += size
+            self._evict(keep=key)
+
+    def __contains__(self, key: Tuple[type, Hashable]) -> bool:
+        with self._lock:
+            try:
+                expires_at = self._entries[key][2]
+            except KeyError:
+                return False
+            return expires_at is None or expires_at > time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def keys(self) -> List[Tuple[type, Hashable]]:
+        with self._lock:
+            return list(self._entries)
+
+    def get(self, key: Tuple[type, Hashable], default: Any = None) -> Any:
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def pop(self, key: Tuple[type, Hashable], *default: Any) -> Any:
+        with self._lock:
+            try:
+                value = self._entries[key][0]
+            except KeyError:
+                if default:
+                    return default[0]
+                raise
+            self._remove(key)
+            return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _remove(self, key: Tuple[type, Hashable]) -> None:
+        value, size, expires_at = self._entries.pop(key)
+        self._bytes -= size
+
+    def _evict(self, keep: Tuple[type, Hashable]) -> None:
+        while self._entries and ((self._max_entries is not None and len(self._entries) > self._max_entries) or
+                                 (self._max_bytes is not None and self._bytes > self._max_bytes)):
+            key = next(iter(self._entries))
+            if key == keep:
+                # Never evict the entry that was just inserted, even if it alone exceeds the limits
+                if len(self._entries) == 1:
+                    break
+                self._entries.move_to_end(key)
+                continue
+            value = self._entries[key][0]
+            self._remove(key)
+            self._evictions += 1
+            if self._on_evict is not None:
+                self._on_evict(key, value)
+
+    @property
+    def hits(self) -> int:
+        return self._hits
+
+    @property
+    def misses(self) -> int:
+        return self._misses
+
+    @property
+    def evictions(self) -> int:
+        return self._evictions
+
+    @property
+    def size(self) -> int:
+        """The estimated number of bytes held by the cache."""
+        return self._bytes
+
+
+class SQLiteCache(object):
+    """A persistent store of champion.gg responses in a SQLite database file.
+
+    Entries are keyed the same way as `ChampionGGCache` and are shared by every process that opens the same file. The
+    file is memory-mapped (up to `mmap_size` bytes), so processes reading it share the operating system's copy of its
+    pages rather than each reading the file into their own buffers. The decoded values aren't shared: `get` decodes an
+    entry into new objects each time, so every process reading an entry holds its own copy of it.
+    """
+    def __init__(self, path: str, mmap_size: int = 256 * 1024 * 1024, timeout: float = 30) -> None:
+        self._path = path
+        self._mmap_size = mmap_size
+        self._timeout = timeout
+        self._lock = Lock()
+        self._connection = None
+        self._pid = None
+        with self._lock:
+            self._connect()
+
+    def _connect(self) -> sqlite3.Connection:
+        # A connection can't be used across a fork, so each worker of a pre-forking server opens its own
+        if self._connection is None or self._pid != os.getpid():
+            self._connection = sqlite3.connect(self._path, timeout=self._timeout, check_same_thread=False, isolation_level=None)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA mmap_size={:d}".format(self._mmap_size))
+            self._connection.execute("CREATE TABLE IF NOT EXISTS responses (type TEXT NOT NULL, key TEXT NOT NULL, value BLOB NOT NULL, stored REAL NOT NULL, PRIMARY KEY (type, key))")
+            self._connection.execute("CREATE TABLE IF NOT EXISTS claims (type TEXT NOT NULL, key TEXT NOT NULL, expires REAL NOT NULL, PRIMARY KEY (type, key))")
+            self._pid = os.getpid()
+        return self._connection
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    @staticmethod
+    def _encode_key(key: Hashable) -> str:
+        return json.dumps(key)
+
+    @staticmethod
+    def _decode_key(key: Any) -> Hashable:
+        # Keys are tuples, which JSON stores as lists
+        if isinstance(key, list):
+            return tuple(SQLiteCache._decode_key(part) for part in key)
+        return key
+
+    def keys(self, type: type) -> List[Hashable]:
+        """Returns the keys of every stored entry of `type`, however old."""
+        with self._lock:
+            rows = self._connect().execute("SELECT key FROM responses WHERE type = ?", (type.__name__,)).fetchall()
+        return [self._decode_key(json.loads(key)) for key, in rows]
+
+    def get(self, type: type, key: Hashable, max_age: float = -1) -> Any:
+        """Returns the stored value, decoded into a new `type`, or raises a KeyError if it is missing or older than `max_age` seconds."""
+        with self._lock:
+            row = self._connect().execute("SELECT value, stored FROM responses WHERE type = ? AND key = ?", (type.__name__, self._encode_key(key))).fetchone()
+        if row is None or (max_age != -1 and row[1] + max_age <= time.time()):
+            raise KeyError((type, key))
+        return type(json.loads(row[0]))
+
+    def put(self, type: type, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._connect().execute("INSERT OR REPLACE INTO responses (type, key, value, stored) VALUES (?, ?, ?, ?)", (type.__name__, self._encode_key(key), json.dumps(value), time.time()))
+
+    def delete(self, type: type, key: Hashable) -> None:
+        with self._lock:
+            self._connect().execute("DELETE FROM responses WHERE type = ? AND key = ?", (type.__name__, self._encode_key(key)))
+
+    def claim(self, type: type, key: Hashable, seconds: float) -> bool:
+        """Marks an entry as being requested for the next `seconds`, unless another process already has; returns whether it was marked.
+
+        A process that crashes while requesting an entry holds its claim until the claim expires.
+        """
+        with self._lock:
+            connection = self._connect()
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                row = connection.execute("SELECT expires FROM claims WHERE type = ? AND key = ?", (type.__name__, self._encode_key(key))).fetchone()
+                claimed = row is None or row[0] <= now
+                if claimed:
+                    connection.execute("INSERT OR REPLACE INTO claims (type, key, expires) VALUES (?, ?, ?)", (type.__name__, self._encode_key(key), now + seconds))
+                connection.execute("COMMIT")
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+        return claimed
+
+    def release(self, type: type, key: Hashable) -> None:
+        with self._lock:
+            self._connect().execute("DELETE FROM claims WHERE type = ? AND key = ?", (type.__name__, self._encode_key(key)))
+
+    def close(self) -> None:
+        with self._lock:
+            if self._connection is not None and self._pid == os.getpid():
+                self._connection.close()
+            self._connection = None
+
+
+class _Flight(object):
+    def __init__(self) -> None:
+        self._done = Event()
+        self._result = None
+        self._error = None
+
+    def wait(self) -> Any:
+        self._done.wait()
+        if self._error is not None:
+            raise self._error
+        return self._result
+
+
+class SingleFlight(object):
+    """Coalesces concurrent calls for the same key into one.
+
+    The first caller for a key runs the call; callers that arrive while it's running wait for it and get its result
+    (or its exception) instead of running the call themselves.
+    """
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self._flights = {}
+
+    def claim(self, key: Hashable) -> Tuple[_Flight, bool]:
+        """Returns the flight for `key` and whether the caller started it, and so must `resolve` it."""
+        with self._lock:
+            try:
+                return self._flights[key], False
+            except KeyError:
+                flight = self._flights[key] = _Flight()
+                return flight, True
+
+    def find(self, key: Hashable) -> _Flight:
+        """Returns the flight for `key` if one is running, without starting one."""
+        with self._lock:
+            return self._flights.get(key, None)
+
+    def resolve(self, key: Hashable, flight: _Flight, result: Any = None, error: BaseException = None) -> None:
+        with self._lock:
+            del self._flights[key]
+        flight._result = result
+        flight._error = error
+        flight._done.set()
+
+    def do(self, key: Hashable, function: Callable[[], Any]) -> Any:
+        flight, leader = self.claim(key)
+        if not leader:
+            return flight.wait()
+        return self.run(key, flight, function)
+
+    def run(self, key: Hashable, flight: _Flight, function: Callable[[], Any]) -> Any:
+        """Runs `function` for a flight the caller claimed and resolves the flight with its result."""
+        try:
+            result = function()
+        except BaseException as error:
+            self.resolve(key, flight, error=error)
+            raise
+        self.resolve(key, flight, result=result)
+        return result
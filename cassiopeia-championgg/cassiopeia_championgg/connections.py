@@ -0,0 +1,415 @@
+from typing import Any, Callable, Iterator, List, Mapping, Sequence, Tuple, Union
+from contextlib import contextmanager, ExitStack
+from io import BytesIO
+from threading import BoundedSemaphore, Event, Lock, Thread
+from queue import Empty, Queue
+import codecs
+import hashlib
+import re
+import time
+import zlib
+from json import JSONDecoder
+import pycurl
+
+from merakicommons.ratelimits import RateLimiter
+
+from cassiopeia.datastores.common import HTTPError
+
+try:
+    import ujson as json
+except ImportError:
+    import json
+
+try:
+    import certifi
+except ImportError:
+    certifi = None
+
+
+def decode_response(status_code: int, body: bytes, response_headers: Mapping[str, str]) -> Union[list, dict, str, bytes]:
+    """Decodes a response body the same way `HTTPClient.get` does, raising an HTTPError for error status codes."""
+    content_type = response_headers.get("Content-Type", "application/octet-stream").upper()
+    match = re.search(r"CHARSET=(\S+)", content_type)
+    if match:
+        body = body.decode(match.group(1))
+    if "APPLICATION/JSON" in content_type:
+        body = json.loads(body)
+    if status_code >= 400:
+        if isinstance(body, dict):
+            message = body.get("message", "")
+        elif isinstance(body, str):
+            message = body
+        else:
+            message = ""
+        raise HTTPError(message, status_code, response_headers)
+    return body
+
+
+class JSONArrayStream(object):
+    """Decodes a JSON array of objects incrementally, as its bytes arrive.
+
+    Each element is decoded as soon as all of its text has arrived and passed through `transform`, so only the
+    unparsed tail of the response is held as text and the whole response is never held as bytes or text at once.
+    `digest` is a SHA-1 of the response's bytes, available once the stream is closed. `size` counts the (decompressed)
+    bytes fed to the stream and `seconds` the time spent decoding them.
+    """
+    _separators = re.compile(r"[\s,]*")
+    # How many places in the buffer to try as the start of its last element
+    _attempts = 4
+
+    def __init__(self, transform: Callable[[dict], Any] = None, encoding: str = "utf-8") -> None:
+        # Elements decoded one at a time share their key strings, the way they would in one `json.loads`
+        keys = {}
+        self._decoder = JSONDecoder(object_pairs_hook=lambda pairs: {keys.setdefault(key, key): value for key, value in pairs})
+        self._transform = transform
+        self._text = codecs.getincrementaldecoder(encoding)()
+        self._buffer = ""
+        self._head = None
+        self._started = False
+        self._finished = False
+        self._error = None
+        self._sha1 = hashlib.sha1()
+        self._items = []
+        self.size = 0
+        self.seconds = 0.0
+
+    def set_encoding(self, encoding: str) -> None:
+        """Sets the encoding of the response's bytes. Must be called before the first call to `feed`."""
+        self._text = codecs.getincrementaldecoder(encoding)()
+
+    def feed(self, chunk: bytes) -> None:
+        start = time.perf_counter()
+        self._sha1.update(chunk)
+        self.size += len(chunk)
+        if self._finished or self._error is not None:
+            return
+        self._buffer += self._text.decode(chunk)
+        self._parse()
+        self.seconds += time.perf_counter() - start
+
+    def _add(self, items: list) -> None:
+        if self._transform is not None:
+            items = [self._transform(item) for item in items]
+        self._items.extend(items)
+
+    def _parse(self) -> None:
+        buffer = self._buffer
+        position = self._separators.match(buffer, 0).end()
+        if not self._started:
+            if position == len(buffer):
+                self._buffer = ""
+                return
+            if buffer[position] != "[":
+                self._error = ValueError("Expected a JSON array, got {!r}".format(buffer[position:position + 20]))
+                return
+            self._started = True
+            position = self._separators.match(buffer, position + 1).end()
+
+        # Decode all of the complete elements in one call if the start of the last element can be found. Elements
+        # usually start with the same key, so look for the first element's start. If it was found inside another
+        # element, the text before it is invalid, so then try the one before it.
+        if self._head is None and position < len(buffer):
+            colon = buffer.find(":", position)
+            if colon > 0:
+                self._head = buffer[position:colon + 1]
+        end = len(buffer)
+        for _ in range(self._attempts if self._head is not None else 0):
+            cut = buffer.rfind(self._head, position + 1, end)
+            if cut < 0:
+                break
+            text = buffer[position:cut].rstrip()
+            try:
+                if not text.endswith(","):
+                    raise ValueError()
+                items = json.loads("[" + text[:-1] + "]")
+            except ValueError:
+                end = cut
+                continue
+            self._add(items)
+            position = cut
+            break
+
+        # Decode whatever is left one element at a time
+        while position < len(buffer):
+            if buffer[position] == "]":
+                self._finished = True
+                break
+            try:
+                item, end = self._decoder.raw_decode(buffer, position)
+            except ValueError:
+                # The rest of this element hasn't arrived yet
+                break
+            self._add([item])
+            position = self._separators.match(buffer, end).end()
+        self._buffer = buffer[position:]
+
+    @property
+    def digest(self) -> str:
+        return self._sha1.hexdigest()
+
+    def close(self) -> list:
+        """Returns the decoded elements, raising a ValueError if the response wasn't a complete JSON array."""
+        self.feed(b"")
+        if self._error is not None:
+            raise self._error
+        if not self._finished:
+            raise ValueError("The response ended before the end of the JSON array")
+        return self._items
+
+
+class _Transfer(object):
+    def __init__(self, curl: pycurl.Curl, url: str, headers: Mapping[str, str] = None, stream: JSONArrayStream = None) -> None:
+        self.curl = curl
+        self.buffer = BytesIO()
+        self.stream = stream
+        self.status_code = None
+        self.response_headers = {}
+        self._write = None
+        self._inflate = None
+        # A request made with a stream expects a JSON array, whether or not the stream ends up decoding it
+        self._expects_array = stream is not None
+        request_headers = ["{header}: {value}".format(header=key, value=value) for key, value in (headers or {}).items()]
+        if not headers or "Accept-Encoding" not in headers:
+            request_headers.append("Accept-Encoding: gzip")
+        curl.setopt(curl.URL, url)
+        curl.setopt(curl.WRITEFUNCTION, self._write_chunk)
+        curl.setopt(curl.HEADERFUNCTION, self._header)
+        curl.setopt(curl.HTTPHEADER, request_headers)
+
+    def _header(self, header_line: bytes) -> None:
+        header_line = header_line.decode("ISO-8859-1")
+        if header_line.startswith("HTTP/"):
+            # A new status line (after a redirect or a 100 Continue) starts a new set of headers
+            self.status_code = int(header_line.split()[1])
+            self.response_headers = {}
+            return
+        if ":" not in header_line:
+            return
+        name, value = header_line.split(":", 1)
+        self.response_headers[name.strip()] = value.strip()
+
+    def _write_chunk(self, chunk: bytes) -> None:
+        # The headers have all arrived by the time the body does, so choose where the body goes on its first chunk
+        if self._write is None:
+            self._write = self._body_writer()
+        self._write(chunk)
+
+    def _body_writer(self) -> Callable[[bytes], None]:
+        content_type = self.response_headers.get("Content-Type", "application/octet-stream").upper()
+        if self.stream is None or not 200 <= (self.status_code or 0) < 300 or "APPLICATION/JSON" not in content_type:
+            self.stream = None
+            return self.buffer.write
+        match = re.search(r"CHARSET=(\S+)", content_type)
+        if match:
+            self.stream.set_encoding(match.group(1))
+        if self.response_headers.get("Content-Encoding", "").upper() == "GZIP":
+            self._inflate = zlib.decompressobj(zlib.MAX_WBITS | 16)
+            return lambda chunk: self.stream.feed(self._inflate.decompress(chunk))
+        return self.stream.feed
+
+    def body(self) -> bytes:
+        body = self.buffer.getvalue()
+        if self.response_headers.get("Content-Encoding", "").upper() == "GZIP":
+            body = zlib.decompress(body, zlib.MAX_WBITS | 16)
+        return body
+
+    def result(self) -> Tuple[Any, dict]:
+        """Returns the decoded body and the response headers, raising an HTTPError for error status codes.
+
+        A successful response to a request made with a stream raises a ValueError unless its body is a JSON array.
+        """
+        if self.stream is not None and self._write is not None:
+            if self._inflate is not None:
+                self.stream.feed(self._inflate.flush())
+            return self.stream.close(), self.response_headers
+        status_code = self.curl.getinfo(self.curl.HTTP_CODE)
+        body = decode_response(status_code, self.body(), self.response_headers)
+        if self._expects_array and 200 <= status_code < 300 and not isinstance(body, list):
+            raise ValueError("Expected a JSON array, got {} ({} bytes)".format(self.response_headers.get("Content-Type", "no content type"), len(self.buffer.getvalue())))
+        return body, self.response_headers
+
+
+class CurlPool(object):
+    """A pool of reusable curl handles for requests to champion.gg.
+
+    curl keeps a handle's connection open between requests, so requests made through the pool skip the TCP and TLS
+    setup of all but the first request on each handle. At most `size` handles are in use at once.
+    """
+    def __init__(self, size: int = 10, user_agent: str = "Mozilla/5.0") -> None:
+        self._size = size
+        self._user_agent = user_agent
+        self._semaphore = BoundedSemaphore(size)
+        self._lock = Lock()
+        self._idle = []
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def _new_handle(self) -> pycurl.Curl:
+        curl = pycurl.Curl()
+        curl.setopt(curl.USERAGENT, self._user_agent)
+        curl.setopt(curl.TCP_KEEPALIVE, 1)
+        if certifi:
+            curl.setopt(curl.CAINFO, certifi.where())
+        return curl
+
+    def _checkout(self) -> pycurl.Curl:
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+        return self._new_handle()
+
+    def _checkin(self, curl: pycurl.Curl) -> None:
+        with self._lock:
+            self._idle.append(curl)
+
+    @contextmanager
+    def connection(self) -> Iterator[pycurl.Curl]:
+        """Borrows a handle from the pool, waiting for one to be returned if all `size` handles are in use."""
+        with self._semaphore:
+            curl = self._checkout()
+            try:
+                yield curl
+            except pycurl.error:
+                # Don't reuse a handle whose connection failed
+                curl.close()
+                raise
+            except Exception:
+                # An HTTP error status or a body that couldn't be decoded leaves the connection usable
+                self._checkin(curl)
+                raise
+            except BaseException:
+                curl.close()
+                raise
+            else:
+                self._checkin(curl)
+
+    def get(self, url: str, headers: Mapping[str, str] = None, rate_limiters: List[RateLimiter] = None, stream: JSONArrayStream = None) -> Tuple[Any, dict]:
+        """Requests `url` on a pooled handle and returns the decoded body and the response headers.
+
+        If `stream` is given, a successful JSON response is decoded by it as the body arrives, and the list of its
+        elements is returned as the body.
+        """
+        with self.connection() as curl:
+            transfer = _Transfer(curl, url, headers, stream)
+            with ExitStack() as stack:
+                for rate_limiter in rate_limiters or []:
+                    stack.enter_context(rate_limiter)
+                curl.perform()
+            return transfer.result()
+
+    def get_many(self, urls: Sequence[str], headers: Mapping[str, str] = None, rate_limiters: List[RateLimiter] = None, streams: Sequence[JSONArrayStream] = None) -> List[Union[Tuple[Any, dict], Exception]]:
+        """Requests every url in parallel from the calling thread using a curl multi handle.
+
+        Each transfer takes one of the pool's `size` handles, so at most `size` transfers run at once, counting those
+        of other threads. Each request enters `rate_limiters` before it starts; another thread waits for the handles
+        and the rate limiters, so the transfers already started keep running while it does.
+        Returns the decoded body and response headers for each url, in order, or the exception the request raised.
+        `streams`, if given, holds a stream for each url to decode its response with, as in `get`.
+        """
+        rate_limiters = list(rate_limiters or [])
+        results = [None] * len(urls)
+        admitted = Queue()
+        stop = Event()
+
+        def exit_limiters(limiters: List[RateLimiter]) -> None:
+            for rate_limiter in reversed(limiters):
+                rate_limiter.__exit__(None, None, None)
+
+        def admit() -> None:
+            for index in range(len(urls)):
+                if stop.is_set():
+                    return
+                self._semaphore.acquire()
+                entered = []
+                try:
+                    for rate_limiter in rate_limiters:
+                        rate_limiter.__enter__()
+                        entered.append(rate_limiter)
+                except BaseException as error:
+                    exit_limiters(entered)
+                    self._semaphore.release()
+                    admitted.put((index, error))
+                    continue
+                admitted.put((index, None))
+
+        def finish(curl: pycurl.Curl, reuse: bool) -> None:
+            multi.remove_handle(curl)
+            exit_limiters(rate_limiters)
+            if reuse:
+                self._checkin(curl)
+            else:
+                curl.close()
+            self._semaphore.release()
+
+        admitter = Thread(target=admit, daemon=True)
+        running = {}
+        pending = len(urls)
+        multi = pycurl.CurlMulti()
+        admitter.start()
+        try:
+            while pending:
+                # Start every transfer that has been admitted, waiting for one if there's nothing else to do
+                while True:
+                    try:
+                        index, error = admitted.get(block=not running)
+                    except Empty:
+                        break
+                    if error is not None:
+                        results[index] = error
+                        pending -= 1
+                        if not pending:
+                            break
+                        continue
+                    transfer = _Transfer(self._checkout(), urls[index], headers, streams[index] if streams is not None else None)
+                    running[transfer.curl] = (index, transfer)
+                    multi.add_handle(transfer.curl)
+                if not running:
+                    continue
+
+                status, active = multi.perform()
+                while status == pycurl.E_CALL_MULTI_PERFORM:
+                    status, active = multi.perform()
+
+                remaining = 1
+                while remaining:
+                    remaining, succeeded, failed = multi.info_read()
+                    for curl in succeeded:
+                        index, transfer = running.pop(curl)
+                        try:
+                            results[index] = transfer.result()
+                        except Exception as error:
+                            results[index] = error
+                        finish(curl, reuse=True)
+                        pending -= 1
+                    for curl, code, message in failed:
+                        index, transfer = running.pop(curl)
+                        finish(curl, reuse=False)
+                        pending -= 1
+                        results[index] = pycurl.error(code, message)
+
+                if running:
+                    # Wake up often enough to start newly admitted transfers promptly
+                    multi.select(0.05 if pending > len(running) else 1.0)
+        finally:
+            stop.set()
+            for curl in list(running):
+                finish(curl, reuse=False)
+            multi.close()
+            # Give back anything admitted after the transfers stopped being started
+            while admitter.is_alive() or not admitted.empty():
+                try:
+                    index, error = admitted.get(timeout=0.05)
+                except Empty:
+                    continue
+                if error is None:
+                    exit_limiters(rate_limiters)
+                    self._semaphore.release()
+        return results
+
+    def close(self) -> None:
+        with self._lock:
+            for curl in self._idle:
+                curl.close()
+            self._idle = []
@@ -1,4 +1,4 @@
-from typing import Set, Union
+from typing import Iterable, Iterator, Mapping, Set, Union
 from enum import Enum
 
 from merakicommons.ghost import ghost_load_on
@@ -24,9 +24,26 @@ class ChampionGGStatsListData(CoreDataList):
 
 
 class ChampionGGMatchupListData(CoreDataList):
+    """A champion's matchups, as `ChampionGGMatchupData`.
+
+    Its elements are kept as their DTOs and each is only built into a `ChampionGGMatchupData` when it's first read.
+    """
     _dto_type = ChampionGGMatchupListDto
     _renamed = {}
 
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return [self[i] for i in range(*item.indices(len(self)))]
+        value = list.__getitem__(self, item)
+        if not isinstance(value, ChampionGGMatchupData):
+            value = ChampionGGMatchupData(**value)
+            list.__setitem__(self, item, value)
+        return value
+
+    def __iter__(self) -> Iterator["ChampionGGMatchupData"]:
+        for i in range(len(self)):
+            yield self[i]
+
     @property
     def region(self) -> str:
         return self._dto["region"]
@@ -74,41 +91,16 @@ class ChampionGGChampionData(CoreData):
 
 
 class ChampionGGMatchupStats:
+    """One champion's side of a matchup.
+
+    This is a view onto the champion's stats in the matchup data rather than a copy of them.
+    """
+    __slots__ = ("_id", "_data", "_champion")
+
     def __init__(self, data, id):
         self._id = id
-        self._twenty_to_thirty = data.get('twentyToThirty', None)
-        self._wins = data.get('wins', None)
-        self._winrate = data.get('winrate', None)
-        self._kills = data.get('kills', None)
-        self._neutral_minions_killed_team_jungle = data.get('neutralMinionsKilledTeamJungle', None)
-        self._total_damage_dealt_to_champions = data.get('totalDamageDealtToChampions', None)
-        self._role = data.get('role', None)
-        self._assists = data.get('assists', None)
-        self._ten_to_twenty = data.get('tenToTwenty', None)
-        self._thirty_to_end = data.get('thirtyToEnd', None)
-        self._zero_to_ten = data.get('zeroToTen', None)
-        self._gold_earned = data.get('goldEarned', None)
-        self._killing_sprees = data.get('killingSprees', None)
-        self._minions_killed = data.get('minionsKilled', None)
-        self._deaths = data.get('deaths', None)
-        self._weighted_score = data.get('weighedScore', None)
-        self._delta_twenty_to_thirty = data.get('deltatwentyToThirty', None)
-        self._delta_wins = data.get('deltawins', None)
-        self._delta_winrate = data.get('deltawinrate', None)
-        self._delta_kills = data.get('deltakills', None)
-        self._delta_neutral_minions_killed_team_jungle = data.get('deltaneutralMinionsKilledTeamJungle', None)
-        self._delta_total_damage_dealt_to_champions = data.get('deltatotalDamageDealtToChampions', None)
-        self._delta_assists = data.get('deltaassists', None)
-        self._delta_ten_to_twenty = data.get('deltatenToTwenty', None)
-        self._delta_thirty_to_end = data.get('deltathirtyToEnd', None)
-        self._delta_zero_to_ten = data.get('deltazeroToTen', None)
-        self._delta_gold_earned = data.get('deltagoldEarned', None)
-        self._delta_killing_sprees = data.get('deltakillingSprees', None)
-        self._delta_minions_killed = data.get('deltaminionsKilled', None)
-        self._delta_deaths = data.get('deltadeaths', None)
-        self._delta_weighted_score = data.get('deltaweighedScore', None)
-        from cassiopeia import Champion
-        self._champion = Champion(id=self.id, region="NA")  # TODO give correct version
+        self._data = data
+        self._champion = None
 
     @property
     def id(self) -> int:
@@ -116,122 +108,125 @@ class ChampionGGMatchupStats:
 
     @property
     def twenty_to_thirty(self) -> int:
-        return self._twenty_to_thirty
+        return self._data.get('twentyToThirty', None)
 
     @property
     def wins(self) -> int:
-        return self._wins
+        return self._data.get('wins', None)
 
     @property
     def winrate(self) -> float:
-        return self._winrate
+        return self._data.get('winrate', None)
 
     @property
     def kills(self) -> int:
-        return self._kills
+        return self._data.get('kills', None)
 
     @property
     def neutral_minions_killed_team_jungle(self) -> int:
-        return self._neutral_minions_killed_team_jungle
+        return self._data.get('neutralMinionsKilledTeamJungle', None)
 
     @property
     def total_damage_dealt_to_champions(self) -> int:
-        return self._total_damage_dealt_to_champions
+        return self._data.get('totalDamageDealtToChampions', None)
 
     @property
     def role(self) -> Role:
-        return self._role
+        return self._data.get('role', None)
 
     @property
     def assists(self) -> int:
-        return self._assists
+        return self._data.get('assists', None)
 
     @property
     def thirty_to_end(self) -> int:
-        return self._thirty_to_end
+        return self._data.get('thirtyToEnd', None)
 
     @property
     def zero_to_ten(self) -> int:
-        return self._zero_to_ten
+        return self._data.get('zeroToTen', None)
 
     @property
     def gold_earned(self) -> int:
-        return self._gold_earned
+        return self._data.get('goldEarned', None)
 
     @property
     def killing_sprees(self) -> int:
-        return self._killing_sprees
+        return self._data.get('killingSprees', None)
 
     @property
     def minions_killed(self) -> int:
-        return self._minions_killed
+        return self._data.get('minionsKilled', None)
 
     @property
     def deaths(self) -> int:
-        return self._deaths
+        return self._data.get('deaths', None)
 
     @property
     def weighted_score(self) -> int:
-        return self._weighted_score
+        return self._data.get('weighedScore', None)
 
     @property
     def delta_twenty_to_thirty(self) -> int:
-        return self._delta_twenty_to_thirty
+        return self._data.get('deltatwentyToThirty', None)
 
     @property
     def delta_wins(self) -> int:
-        return self._delta_wins
+        return self._data.get('deltawins', None)
 
     @property
     def delta_kills(self) -> int:
-        return self._delta_kills
+        return self._data.get('deltakills', None)
 
     @property
     def delta_neutral_minions_killed_team_jungle(self) -> int:
-        return self._delta_neutral_minions_killed_team_jungle
+        return self._data.get('deltaneutralMinionsKilledTeamJungle', None)
 
     @property
     def delta_total_damage_dealt_to_champions(self) -> int:
-        return self._delta_total_damage_dealt_to_champions
+        return self._data.get('deltatotalDamageDealtToChampions', None)
 
     @property
     def delta_assists(self) -> int:
-        return self._delta_assists
+        return self._data.get('deltaassists', None)
 
     @property
     def delta_ten_to_twenty(self) -> int:
-        return self._delta_ten_to_twenty
+        return self._data.get('deltatenToTwenty', None)
 
     @property
     def delta_thirty_to_end(self) -> int:
-        return self._delta_thirty_to_end
+        return self._data.get('deltathirtyToEnd', None)
 
     @property
     def delta_zero_to_ten(self) -> int:
-        return self._delta_zero_to_ten
+        return self._data.get('deltazeroToTen', None)
 
     @property
     def delta_gold_earned(self) -> int:
-        return self._delta_gold_earned
+        return self._data.get('deltagoldEarned', None)
 
     @property
     def delta_killing_sprees(self) -> int:
-        return self._delta_killing_sprees
+        return self._data.get('deltakillingSprees', None)
 
     @property
     def delta_minions_killed(self) -> int:
-        return self._delta_minions_killed
+        return self._data.get('deltaminionsKilled', None)
 
     @property
     def delta_deaths(self) -> int:
-        return self._delta_deaths
+        return self._data.get('deltadeaths', None)
 
     @property
     def delta_weighted_score(self) -> int:
-        return self._delta_weighted_score
+        return self._data.get('deltaweighedScore', None)
 
     @property
     def champion(self) -> "Champion":
+        if self._champion is None:
+            from cassiopeia import Champion
+            self._champion = Champion(id=self.id, region="NA")  # TODO give correct version
         return self._champion
 
 
@@ -273,28 +268,29 @@ class ChampionGGMatchup(CassiopeiaGhost):
     def patch(self) -> Patch:
         return self._patch
 
-    @property
-    def me(self) -> ChampionGGMatchupStats:
+    @lazy_property
+    def _sides(self) -> (ChampionGGMatchupStats, ChampionGGMatchupStats):
         data = self._data[ChampionGGMatchupData]
+        champ1 = ChampionGGMatchupStats(data.champ1, id=data.champ1_id)
+        champ2 = ChampionGGMatchupStats(data.champ2, id=data.champ2_id)
         if data.champ1_id == self._hack:
-            return ChampionGGMatchupStats(data.champ1, id=data.champ1_id)
+            return champ1, champ2
         else:
-            return ChampionGGMatchupStats(data.champ2, id=data.champ2_id)
+            return champ2, champ1
 
     @property
-    def enemy(self) -> ChampionGGMatchupStats:
-        data = self._data[ChampionGGMatchupData]
-        if data.champ1_id == self._hack:
-            return ChampionGGMatchupStats(data.champ2, id=data.champ2_id)
-        else:
-            return ChampionGGMatchupStats(data.champ1, id=data.champ1_id)
+    def me(self) -> ChampionGGMatchupStats:
+        return self._sides[0]
 
     @property
+    def enemy(self) -> ChampionGGMatchupStats:
+        return self._sides[1]
+
+    @lazy_property
     def winrate(self) -> float:
-        total = self.me.wins + self.enemy.wins
-        return self.me.wins / total
+        return self.me.wins / self.nmatches
 
-    @property
+    @lazy_property
     def nmatches(self) -> int:
         return self.me.wins + self.enemy.wins
 
@@ -466,7 +462,7 @@ class ChampionGGStats(CassiopeiaObject):
 class MultipleChampionGGStats(CassiopeiaGhost, list):
     """Contains data for one champion for multiple roles."""
     _data_types = {MultipleChampionGGStatsData}
-    def __init__(self, *, id: int, patch: Union[Patch, str], elo: Set[str] = None, region: Union[Region, str] = None):
+    def __init__(self, *, id: int, patch: Union[Patch, str], elo: Set[str] = None, region: Union[Region, str] = None, fields: Set[str] = None):
         if region is None:
             region = configuration.settings.default_region
         if region is not None and not isinstance(region, Region):
@@ -483,18 +479,22 @@ class MultipleChampionGGStats(CassiopeiaGhost, list):
         self._region = region
         self._patch = patch
         self._elo = elo
+        self._fields = fields
         list.__init__(self, [])
 
     @classmethod
-    def from_data(cls, data, id: int, patch: Union[Patch, str], elo: Set[str] = None, region: Union[Region, str] = None):
+    def from_data(cls, data, id: int, patch: Union[Patch, str], elo: Set[str] = None, region: Union[Region, str] = None, fields: Set[str] = None):
         self = cls.__new__(cls)
-        cls.__init__(self, id=id, patch=patch, elo=elo, region=region)
+        cls.__init__(self, id=id, patch=patch, elo=elo, region=region, fields=fields)
         for d in data:
             self.append(d)
         return self
 
     def __get_query__(self):
-        return {"id": self.id, "patch": self.patch.name, "elo": "_".join(self.elo)}
+        query = {"id": self.id, "patch": self.patch.name, "elo": "_".join(self.elo)}
+        if self._fields is not None:
+            query["fields"] = self._fields
+        return query
 
     @property
     def region(self) -> Region:
@@ -517,7 +517,11 @@ class MultipleChampionGGStats(CassiopeiaGhost, list):
 class ChampionGGChampion(object):
     _data_types = {ChampionGGChampionData}
 
-    def __init__(self, *, id: int, patch: Patch, elo: Set[str] = None, region: Union[Region, str] = None):
+    def __init__(self, *, id: int, patch: Patch, elo: Set[str] = None, region: Union[Region, str] = None, fields: Set[str] = None):
+        """`fields` are the champion.gg `champData` fields to request (for example {"winRate", "playRate"}).
+
+        By default a broad set of fields is requested, including the large `hashes` and `damage` fields.
+        """
         self._id = id
         if region is None:
             region = configuration.settings.default_region
@@ -530,6 +534,7 @@ class ChampionGGChampion(object):
         if isinstance(patch, str):
             patch = Patch.from_str(patch, region=region)
         self._patch = patch
+        self._fields = fields
         self._roles = {}
 
     def __get_query__(self):
@@ -557,13 +562,113 @@ class ChampionGGChampion(object):
         return self.roles[role]
 
     def load(self):
-        role_data = MultipleChampionGGStats(id=self.id, patch=self.patch, elo=self.elo, region=self.region).load(load_groups={MultipleChampionGGStatsData})
+        role_data = MultipleChampionGGStats(id=self.id, patch=self.patch, elo=self.elo, region=self.region, fields=self._fields).load(load_groups={MultipleChampionGGStatsData})
         for data in role_data._data[MultipleChampionGGStatsData]:
             stats = ChampionGGStats.from_data(data=data)
             self._roles[stats.role] = stats
 
+    @classmethod
+    def load_many(cls, champions: Iterable["ChampionGGChampion"]) -> None:
+        """Loads many champions' data with one request to the pipeline for each champion list they need, rather than one each.
+
+        Champions that aren't in the list are left unloaded, and raise a NotFoundError when their roles are accessed.
+        """
+        groups = {}
+        for champion in champions:
+            elo = champion.elo if isinstance(champion.elo, str) else "_".join(champion.elo)
+            fields = None if champion._fields is None else tuple(sorted(champion._fields))
+            groups.setdefault((champion.patch.name, elo, fields), []).append(champion)
+
+        for (patch, elo, fields), group in groups.items():
+            query = {"ids": [champion.id for champion in group], "patch": patch, "elo": elo}
+            if fields is not None:
+                query["fields"] = fields
+            # The data source looks every champion up in the champion list's index
+            ggs = configuration.settings.pipeline.get_many(MultipleChampionGGStatsDto, query=query)
+            for champion, gg in zip(group, ggs):
+                for row in gg["data"]:
+                    stats = ChampionGGStats.from_data(data=ChampionGGStatsData(**row))
+                    champion._roles[stats.role] = stats
+
     @property
     def roles(self):
         if not self._roles:
             self.load()
         return self._roles
+
+
+class ChampionGGChampions(object):
+    """Every champion's champion.gg data for a patch and elo, built from one champion list.
+
+    Iterate over it for each champion's `ChampionGGChampion`, or index it by champion id:
+
+        champions = ChampionGGChampions(patch="8.1")
+        champions[99][Role.middle].win_rate
+
+    The list is requested the first time the collection is used.
+    """
+    _data_types = {ChampionGGStatsListData}
+
+    def __init__(self, *, patch: Union[Patch, str], elo: Set[str] = None, region: Union[Region, str] = None, fields: Set[str] = None):
+        if region is None:
+            region = configuration.settings.default_region
+        if region is not None and not isinstance(region, Region):
+            region = Region(region)
+        if elo is None:
+            elo = "PLATINUM_DIAMOND_MASTER_CHALLENGER"
+        self._region = region
+        self._elo = elo
+        if isinstance(patch, str):
+            patch = Patch.from_str(patch, region=region)
+        self._patch = patch
+        self._fields = fields
+        self._champions = None
+
+    def __get_query__(self):
+        query = {"patch": self.patch.name, "elo": self.elo if isinstance(self.elo, str) else "_".join(self.elo)}
+        if self._fields is not None:
+            query["fields"] = self._fields
+        return query
+
+    @property
+    def region(self) -> Region:
+        return self._region
+
+    @property
+    def elo(self) -> Set[str]:
+        return self._elo
+
+    @property
+    def patch(self) -> Patch:
+        return self._patch
+
+    def load(self):
+        data = configuration.settings.pipeline.get(ChampionGGStatsListData, query=self.__get_query__())
+        champions = {}
+        for role_data in data:
+            champion = ChampionGGChampion(id=role_data.id, patch=self.patch, elo=self.elo, region=self.region, fields=self._fields)
+            for stats_data in role_data:
+                stats = ChampionGGStats.from_data(data=stats_data)
+                champion._roles[stats.role] = stats
+            champions[role_data.id] = champion
+        self._champions = champions
+        return self
+
+    @property
+    def champions(self) -> Mapping[int, ChampionGGChampion]:
+        """Each champion's data, keyed by champion id."""
+        if self._champions is None:
+            self.load()
+        return self._champions
+
+    def __getitem__(self, id: int) -> ChampionGGChampion:
+        return self.champions[getattr(id, "id", id)]
+
+    def __contains__(self, id: int) -> bool:
+        return getattr(id, "id", id) in self.champions
+
+    def __iter__(self) -> Iterator[ChampionGGChampion]:
+        return iter(self.champions.values())
+
+    def __len__(self) -> int:
+        return len(self.champions)
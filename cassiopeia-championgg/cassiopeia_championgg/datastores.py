@@ -1,17 +1,28 @@
-from typing import Type, TypeVar, MutableMapping, Any, Iterable
+from typing import Type, TypeVar, Mapping, MutableMapping, Any, Iterable, Iterator, Generator, Hashable, Callable, Tuple, Dict, List, Optional, Union
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 import os
 import copy
-import pycurl
+import hashlib
+import time
+from threading import Lock
 
 from datapipelines import DataSource, PipelineContext, Query, NotFoundError, validate_query
-from merakicommons.ratelimits import FixedWindowRateLimiter, MultiRateLimiter
+from merakicommons.ratelimits import RateLimiter, FixedWindowRateLimiter, MultiRateLimiter
 
 from cassiopeia.datastores.common import HTTPClient, HTTPError
 from cassiopeia.datastores.uniquekeys import convert_region_to_platform
 
 from .dto import ChampionGGStatsListDto, ChampionGGStatsDto, ChampionGGMatchupListDto, MultipleChampionGGStatsDto
 from .core import ChampionGGStats, MultipleChampionGGStats
-from .form_urls import get_champion_url, get_champion_matchup_url
+from .form_urls import get_champion_url, get_champion_matchup_url, API_URL, CHAMPION_DATA, DEFAULT_CHAMPION_DATA
+from .cache import ChampionGGCache, SQLiteCache, SingleFlight
+from .table import ChampionGGStatsTable, ChampionGGEloTable
+from .matrix import ChampionGGMatchupMatrix
+from .connections import CurlPool, JSONArrayStream
+from .ratelimits import SharedRateLimiter, adaptive_rate_limiter
+from .snapshot import Snapshot, write_snapshot
+from .history import ChampionGGHistory
+from .instrumentation import Metrics, TimedRateLimiter, metrics as default_metrics
 
 try:
     import ujson as json
@@ -21,27 +32,265 @@ except ImportError:
 T = TypeVar("T")
 ELOS = ["BRONZE", "SILVER", "GOLD", "PLATINUM", "PLATINUM_DIAMOND_MASTER_CHALLENGER"]
 ROLES = ['TOP', 'JUNGLE', 'MIDDLE', 'SYNERGY', 'ADCSUPPORT', 'DUO_CARRY']
+# The number of rows to request per page of the champion list
+CHAMPION_LIST_PAGE_SIZE = 500
+# (window seconds, permits per window)
+RATE_LIMITS = [(600, 3000), (10, 50)]
+# How long a worker sharing the cache may take to request data before the others stop waiting for it, and how often they check
+SHARED_CLAIM_SECONDS = 120
+SHARED_POLL_SECONDS = 0.1
+MATCHUP_ROLES = {"TOP": "TOP",
+                 "JUNGLE": "JUNGLE",
+                 "MIDDLE": "MIDDLE",
+                 "DUO_SUPPORT": "ADCSUPPORT",
+                 "DUO_CARRY": "DUO_CARRY"
+}
+
+
+class _ChampionListIndex(object):
+    """Hash lookups into the rows of a ChampionGGStatsListDto by (championId, role) and by championId."""
+    def __init__(self, ggs: ChampionGGStatsListDto) -> None:
+        self.source = ggs
+        self.by_champion_role = {}
+        self.by_champion = {}
+        self._table = None
+        self.add(ggs["data"])
+
+    def add(self, rows: Iterable[dict]) -> None:
+        for dto in rows:
+            id = dto.get("championId", None)
+            self.by_champion_role.setdefault((id, dto.get("role", None)), dto)
+            self.by_champion.setdefault(id, []).append(dto)
+        self._table = None
+
+    @property
+    def table(self) -> ChampionGGStatsTable:
+        if self._table is None:
+            self._table = ChampionGGStatsTable.from_dto(self.source)
+        return self._table
 
 
 class ChampionGG(DataSource):
-    def __init__(self, api_key: str, http_client: HTTPClient = None) -> None:
+    def __init__(self, api_key: str = None, http_client: HTTPClient = None, max_cache_entries: int = None, max_cache_bytes: int = None, expirations: Mapping[type, float] = None, cache_path: str = None, connection_pool_size: int = 10, user_agent: str = "Mozilla/5.0", api_url: str = API_URL, rate_limits: Iterable[Tuple[int, int]] = None, metrics: Metrics = None, shared: bool = False, snapshot_path: str = None, rate_limiter: Union[str, RateLimiter] = None, max_burst: int = None, max_page_size: int = None) -> None:
         try:
             api_key = os.environ[api_key]
-        except KeyError:
+        except (KeyError, TypeError):
             pass
         self._key = api_key
+        self._api_url = api_url.rstrip("/")
 
+        # A caller's HTTP client (for a proxy, or a test double) is used for every request, matchups included
+        self._client_given = http_client is not None
         if http_client is None:
             self._client = HTTPClient()
         else:
             self._client = http_client
+        self._connections = CurlPool(size=connection_pool_size, user_agent=user_agent)
+
+        if rate_limits is None:
+            rate_limits = RATE_LIMITS
+        self._rate_limits = [tuple(limit) for limit in rate_limits]
+        # The most rows champion.gg returns per request, if it caps `limit` below the page size asked for
+        self._max_page_size = max_page_size
+        self._metrics = metrics if metrics is not None else default_metrics
+        if shared and cache_path is None:
+            raise ValueError("`shared` requires a `cache_path` for the worker processes to share.")
+        self._shared = shared
+        # Limiters using the same key draw from one budget; the key itself isn't written to the shared file
+        name = hashlib.sha1((self._key or "").encode("utf-8")).hexdigest()
+        if shared:
+            # Only fixed windows are kept in the shared file; any other limiter would only limit its own process
+            if rate_limiter is not None and rate_limiter != "fixed":
+                raise ValueError("`rate_limiter` must be \"fixed\" when `shared` is set. Got \"{}\"".format(rate_limiter))
+            limiter = SharedRateLimiter(cache_path, self._rate_limits, name=name)
+        elif rate_limiter is None or rate_limiter == "adaptive":
+            limiter = adaptive_rate_limiter(name, self._rate_limits, max_burst=max_burst)
+        elif rate_limiter == "fixed":
+            limiter = MultiRateLimiter(*[
+                FixedWindowRateLimiter(window_seconds, window_permits) for window_seconds, window_permits in self._rate_limits
+            ])
+        elif not isinstance(rate_limiter, str):
+            limiter = rate_limiter
+        else:
+            raise ValueError("`rate_limiter` must be \"adaptive\", \"fixed\", or a RateLimiter. Got \"{}\"".format(rate_limiter))
+        # Limiters that adjust to champion.gg's rate limit headers are given each response's status code and headers
+        self._update_rate_limiter = getattr(limiter, "update", None)
+        self._rate_limiter = TimedRateLimiter(limiter, self._metrics)
+
+        self._cached_data = ChampionGGCache(max_entries=max_cache_entries, max_bytes=max_cache_bytes, expirations=expirations, on_evict=self._on_cache_evict)
+        self._list_indexes = {}
+        # Champion lists being paged, and the partial list each is cached as until its last page arrives
+        self._partial_lists = {}
+        self._partial_lists_lock = Lock()
+        self._matchup_matrices = {}
+        self._validators = {}
+        self._flights = SingleFlight()
+        if cache_path is not None:
+            self._disk_cache = SQLiteCache(cache_path)
+        else:
+            self._disk_cache = None
+        if snapshot_path is not None:
+            self._snapshot = Snapshot(snapshot_path)
+        else:
+            self._snapshot = None
+
+    def _on_cache_evict(self, key, value) -> None:
+        # Everything derived from a cached list goes with it, so the cache's limits bound it too
+        self._validators.pop(key, None)
+        if key[0] is ChampionGGStatsListDto:
+            index = self._list_indexes.get(key[1], None)
+            if index is not None and index.source is value:
+                self._list_indexes.pop(key[1], None)
+        elif key[0] is ChampionGGMatchupListDto:
+            id, patch, elo, role = key[1]
+            matrix = self._matchup_matrices.get((patch, elo, role), None)
+            if matrix is not None and id in matrix.added:
+                # The matrix is rebuilt from the lists that are still cached the next time it's asked for
+                self._matchup_matrices.pop((patch, elo, role), None)
+
+    @property
+    def cache(self) -> ChampionGGCache:
+        """The in-memory cache of champion.gg responses, including its hit, miss, and eviction counters."""
+        return self._cached_data
+
+    @property
+    def metrics(self) -> Metrics:
+        """The registry this data source records its timings, payload sizes, and cache hits and misses in."""
+        return self._metrics
+
+    def _get_cached(self, type: Type[T], key: Hashable) -> T:
+        if type is ChampionGGStatsListDto and key in self._partial_lists:
+            # A list that's still being paged isn't complete, so it's treated as not cached yet
+            raise KeyError((type, key))
+        try:
+            value = self._cached_data[(type, key)]
+            self._metrics.increment("cache.hit")
+            return value
+        except KeyError:
+            self._metrics.increment("cache.miss")
+        if self._snapshot is not None and (type, key) in self._snapshot:
+            value = self._snapshot.get(type, key)
+            self._metrics.increment("snapshot.hit")
+            self._cached_data[(type, key)] = value
+            return value
+        if self._disk_cache is None:
+            raise KeyError((type, key))
+        value = self._disk_cache.get(type, key, max_age=self._cached_data.expiration(type))
+        self._metrics.increment("disk_cache.hit")
+        self._cached_data[(type, key)] = value
+        return value
+
+    def _put_cached(self, type: Type[T], key: Hashable, value: T) -> None:
+        self._cached_data[(type, key)] = value
+        if self._disk_cache is not None:
+            self._disk_cache.put(type, key, value)
+
+    def _coalesce(self, type: Type[T], key: Hashable, function: Callable[[], T]) -> T:
+        # Concurrent requests for the same data wait for the first one's response rather than requesting it again
+        flight, leader = self._flights.claim((type, key))
+        if not leader:
+            self._metrics.increment("coalesced")
+            return flight.wait()
+        return self._flights.run((type, key), flight, lambda: self._fetch_once(type, key, function))
+
+    def _fetch_once(self, type: Type[T], key: Hashable, function: Callable[[], T]) -> T:
+        # Worker processes sharing the cache wait for whichever of them is already requesting the data to store it
+        if not self._shared:
+            return function()
+        while not self._disk_cache.claim(type, key, seconds=SHARED_CLAIM_SECONDS):
+            time.sleep(SHARED_POLL_SECONDS)
+            try:
+                value = self._disk_cache.get(type, key, max_age=self._cached_data.expiration(type))
+            except KeyError:
+                continue
+            self._metrics.increment("coalesced")
+            self._cached_data[(type, key)] = value
+            return value
+        try:
+            return function()
+        finally:
+            self._disk_cache.release(type, key)
 
-        self._rate_limiter = MultiRateLimiter(
-            FixedWindowRateLimiter(600, 3000),
-            FixedWindowRateLimiter(10, 50)
-        )
+    @staticmethod
+    def _format_parameters(params: Mapping[str, Any]) -> str:
+        return "&".join(["{key}={value}".format(key=key, value=value) for key, value in params.items()])
+
+    @staticmethod
+    def _convert_error(error: HTTPError) -> Exception:
+        if error.code == 403:
+            return HTTPError(message="Forbidden", code=error.code)
+        return NotFoundError(str(error))
 
-        self._cached_data = {}
+    def _check_key(self) -> None:
+        if self._key is None:
+            raise NotFoundError("No champion.gg API key was given, so only data in the snapshot or cache can be returned.")
+
+    def _observe_response(self, response: Union[Tuple[Any, dict], Exception]) -> None:
+        if self._update_rate_limiter is None:
+            return
+        if isinstance(response, HTTPError):
+            self._update_rate_limiter(response.code, response.response_headers)
+        elif not isinstance(response, Exception):
+            # Error status codes raise an HTTPError, so a response that was returned succeeded (or was 304 Not Modified)
+            self._update_rate_limiter(200, response[1])
+
+    def _request(self, url: str, params: Mapping[str, Any], headers: Mapping[str, str] = None) -> (Any, dict):
+        self._check_key()
+        try:
+            with self._connections.connection() as connection:
+                result = self._client.get(url, self._format_parameters(params), headers=headers, rate_limiters=[self._rate_limiter], connection=connection, encode_parameters=False)
+        except HTTPError as error:
+            self._observe_response(error)
+            raise self._convert_error(error) from error
+        self._observe_response(result)
+        return result
+
+    def _stream(self, url: str, params: Mapping[str, Any], stream: JSONArrayStream, headers: Mapping[str, str] = None) -> (Any, dict):
+        if self._client_given:
+            with self._metrics.time("request.matchups"):
+                data, response_headers = self._request(url, params, headers=headers)
+            if isinstance(data, list):
+                # The client has already decoded the list, so it's put through the stream to be compacted and hashed
+                stream.feed(json.dumps(data).encode("utf-8"))
+                data = stream.close()
+            elif not headers:
+                # Only a conditional request can come back without a list (as 304 Not Modified)
+                raise ValueError("Expected a JSON array, got {}".format(type(data).__name__))
+            self._observe_stream(stream)
+            return data, response_headers
+        self._check_key()
+        try:
+            with self._metrics.time("request.matchups"):
+                result = self._connections.get("{url}?{params}".format(url=url, params=self._format_parameters(params)), headers=headers, rate_limiters=[self._rate_limiter], stream=stream)
+        except HTTPError as error:
+            self._observe_response(error)
+            raise self._convert_error(error) from error
+        self._observe_response(result)
+        self._observe_stream(stream)
+        return result
+
+    def _observe_stream(self, stream: JSONArrayStream) -> None:
+        if stream.size:
+            self._metrics.observe("decode.matchups", stream.seconds)
+            self._metrics.observe("payload_bytes.matchups", stream.size)
+
+    def _stream_many(self, requests: List[Tuple[str, Mapping[str, Any]]], streams: List[JSONArrayStream]) -> List[Union[Tuple[Any, dict], Exception]]:
+        """Requests each `(url, params)` into its stream, returning the body and headers or the exception for each."""
+        if self._client_given:
+            responses = []
+            for (url, params), stream in zip(requests, streams):
+                try:
+                    responses.append(self._stream(url, params, stream))
+                except Exception as error:
+                    responses.append(error)
+            return responses
+        urls = ["{url}?{params}".format(url=url, params=self._format_parameters(params)) for url, params in requests]
+        responses = self._connections.get_many(urls, rate_limiters=[self._rate_limiter], streams=streams)
+        for stream, response in zip(streams, responses):
+            self._observe_response(response)
+            if not isinstance(response, Exception):
+                self._observe_stream(stream)
+        return responses
 
     @DataSource.dispatch
     def get(self, type: Type[T], query: MutableMapping[str, Any], context: PipelineContext = None) -> T:
@@ -57,43 +306,197 @@ class ChampionGG(DataSource):
 
     _validate_get_gg_champion_list_query = Query. \
         has("patch").as_(str).also. \
-        can_have("elo").with_default(lambda *args, **kwargs: "PLATINUM_DIAMOND_MASTER_CHALLENGER", supplies_type=str)
+        can_have("elo").with_default(lambda *args, **kwargs: "PLATINUM_DIAMOND_MASTER_CHALLENGER", supplies_type=str).also. \
+        can_have("fields")
 
     @get.register(ChampionGGStatsListDto)
     @validate_query(_validate_get_gg_champion_list_query, convert_region_to_platform)
     def get_gg_champion_list(self, query: MutableMapping[str, Any], context: PipelineContext = None) -> ChampionGGStatsListDto:
-        if not query["elo"] in ELOS:
-            raise ValueError("`elo` must be one of {}. Got \"{}\"".format(ELOS, query["elo"]))
+        return self.fetch_champion_list(patch=query["patch"], elo=query["elo"], fields=query.get("fields", None))
+
+    @staticmethod
+    def _projection(fields: Iterable[str] = None) -> Tuple[str, ...]:
+        if fields is None:
+            return DEFAULT_CHAMPION_DATA
+        if isinstance(fields, str):
+            fields = fields.split(",")
+        fields = set(fields)
+        if not fields.issubset(CHAMPION_DATA):
+            raise ValueError("`fields` must be a subset of {}. Got \"{}\"".format(CHAMPION_DATA, sorted(fields)))
+        return tuple(sorted(fields))
+
+    def fetch_champion_list(self, patch: str, elo: str = "PLATINUM_DIAMOND_MASTER_CHALLENGER", fields: Iterable[str] = None) -> ChampionGGStatsListDto:
+        """Returns the champion list with at least the `champData` `fields` (by default, DEFAULT_CHAMPION_DATA).
+
+        The list comes from the cache if it's there, and is requested (once, however many threads ask for it) if not.
+        """
+        if not elo in ELOS:
+            raise ValueError("`elo` must be one of {}. Got \"{}\"".format(ELOS, elo))
+        fields = self._projection(fields)
+
+        with self._metrics.time("fetch.champion_list"):
+            result = self._get_cached_champion_list(patch, elo, fields)
+            if result is not None:
+                return result
+            return self._coalesce(ChampionGGStatsListDto, (patch, elo, fields), lambda: self._load_champion_list(patch, elo, fields))
+
+    def _load_champion_list(self, patch: str, elo: str, fields: Tuple[str, ...]) -> ChampionGGStatsListDto:
+        # Another thread may have finished loading the list since the cache was checked
+        result = self._get_cached_champion_list(patch, elo, fields)
+        if result is not None:
+            return result
+        pages = self._page_champion_list(patch, elo, fields)
+        while True:
+            try:
+                next(pages)
+            except StopIteration as stop:
+                return stop.value
 
+    def _get_cached_champion_list(self, patch: str, elo: str, fields: Tuple[str, ...]) -> Optional[ChampionGGStatsListDto]:
         try:
-            return self._cached_data[(self.get_gg_champion_list, (query["patch"], query["elo"]))]
+            return self._get_cached(ChampionGGStatsListDto, (patch, elo, fields))
         except KeyError:
-            url, params = get_champion_url(api_key=self._key, **{k: v for k, v in query.items() if k != "patch"})
-            params = "&".join(["{key}={value}".format(key=key, value=value) for key, value in params.items()])
-            try:
-                c = pycurl.Curl()
-                c.setopt(c.USERAGENT, "Mozilla/5.0")
-                data, response_headers = self._client.get(url, params, rate_limiters=[self._rate_limiter], connection=c, encode_parameters=False)
-            except HTTPError as error:
-                if error.code == 403:
-                    raise HTTPError(message="Forbidden", code=error.code)
-                raise NotFoundError(str(error)) from error
-
-            for datum in data:
-                datum.pop("_id")
-            data = {"data": data}
-            data["patch"] = query["patch"]
-            data["elo"] = query["elo"]
-            result = ChampionGGStatsListDto(data)
-            self._cached_data[(self.get_gg_champion_list, query["patch"])] = result
-            self._cached_data[(self.get_gg_champion_list, (query["patch"], query["elo"]))] = result
-            return result
+            pass
+        # A cached list with more fields than were asked for can be used as is
+        keys = self._cached_data.keys()
+        if self._snapshot is not None:
+            keys += self._snapshot.keys()
+        if self._disk_cache is not None:
+            keys += [(ChampionGGStatsListDto, key) for key in self._disk_cache.keys(ChampionGGStatsListDto)]
+        for type, key in keys:
+            if type is ChampionGGStatsListDto and key[:2] == (patch, elo) and set(fields).issubset(key[2]):
+                try:
+                    return self._get_cached(type, key)
+                except KeyError:
+                    pass
+        return None
+
+    def _page_limit(self, page_size: int) -> int:
+        return page_size if self._max_page_size is None else min(page_size, self._max_page_size)
+
+    def _page_champion_list(self, patch: str, elo: str, fields: Tuple[str, ...], page_size: int = CHAMPION_LIST_PAGE_SIZE) -> Generator[List[dict], None, ChampionGGStatsListDto]:
+        """Requests the champion list `page_size` rows at a time, yielding each page as it arrives.
+
+        A page with fewer rows than were asked for is the last one, so a list shorter than `page_size` takes one
+        request. If champion.gg caps the rows per request below `page_size`, the `max_page_size` setting must say so,
+        or the list would end after the first page. The list and its index are cached as the pages arrive, but the list
+        isn't returned from the cache (or written to the disk cache) until its last page has arrived. If the generator
+        is closed early the partial list is dropped.
+        """
+        key = (patch, elo, fields)
+        result = ChampionGGStatsListDto({"data": [], "patch": patch, "elo": elo, "fields": list(fields)})
+        index = _ChampionListIndex(result)
+        digest = hashlib.sha1()
+        limit = self._page_limit(page_size)
+        skip = 0
+        page_validators = []
+        # If another thread (or an iterator this thread abandoned) is already paging the list, this one only caches it
+        # once it's complete
+        self._partial_lists.setdefault(key, result)
+        try:
+            while True:
+                url, params = get_champion_url(api_key=self._key, api_url=self._api_url, elo=elo, fields=fields, limit=limit, skip=skip)
+                with self._metrics.time("request.champion_list"):
+                    page, response_headers = self._request(url, params)
+                if "Content-Length" in response_headers:
+                    self._metrics.observe("payload_bytes.champion_list", int(response_headers["Content-Length"]))
+                with self._metrics.time("strip_ids.champion_list"):
+                    for datum in page:
+                        datum.pop("_id")
+                        # The hash is of the rows as they're cached, so a list loaded from disk can be compared to it
+                        digest.update(self._encode_for_hash(datum))
+                with self._metrics.time("build.champion_list"):
+                    result["data"].extend(page)
+                    index.add(page)
+                    with self._partial_lists_lock:
+                        if self._partial_lists.get(key, None) is result:
+                            self._cached_data[(ChampionGGStatsListDto, key)] = result
+                            self._list_indexes[key] = index
+                page_validators.append(self._page_validators(skip, len(page), response_headers))
+                yield page
+                if len(page) < limit:
+                    break
+                skip += limit
+        except BaseException:
+            with self._partial_lists_lock:
+                if self._partial_lists.get(key, None) is result:
+                    del self._partial_lists[key]
+                    self._cached_data.pop((ChampionGGStatsListDto, key), None)
+                    if self._list_indexes.get(key, None) is index:
+                        del self._list_indexes[key]
+            raise
+
+        self._remember_validators(ChampionGGStatsListDto, key, None, {}, digest=digest.hexdigest(), pages=page_validators)
+        with self._partial_lists_lock:
+            # A complete list replaces any other thread's partial one, which stops caching its pages
+            self._partial_lists.pop(key, None)
+            self._put_cached(ChampionGGStatsListDto, key, result)
+            self._list_indexes[key] = index
+        return result
+
+    def iter_champion_list(self, patch: str, elo: str = "PLATINUM_DIAMOND_MASTER_CHALLENGER", fields: Iterable[str] = None, page_size: int = CHAMPION_LIST_PAGE_SIZE) -> Iterator[dict]:
+        """Yields the rows of the champion list for `patch` and `elo` as they arrive.
+
+        If the list isn't cached it's requested `page_size` rows at a time, so the first rows are available as soon as
+        the first page arrives and only one page is being decoded at a time. The list is cached as it's iterated, and
+        returned from the cache once it has been iterated to the end.
+        """
+        if not elo in ELOS:
+            raise ValueError("`elo` must be one of {}. Got \"{}\"".format(ELOS, elo))
+        fields = self._projection(fields)
+
+        result = self._get_cached_champion_list(patch, elo, fields)
+        if result is None:
+            # Wait for another thread that's already requesting the list. The iterator may be abandoned part way
+            # through, so it doesn't make other threads wait for it in turn.
+            flight = self._flights.find((ChampionGGStatsListDto, (patch, elo, fields)))
+            if flight is not None:
+                self._metrics.increment("coalesced")
+                result = flight.wait()
+        if result is not None:
+            yield from result["data"]
+        else:
+            for page in self._page_champion_list(patch, elo, fields, page_size=page_size):
+                yield from page
+
+    def _store_champion_list(self, data: list, patch: str, elo: str, fields: Tuple[str, ...]) -> ChampionGGStatsListDto:
+        data = {"data": data}
+        data["patch"] = patch
+        data["elo"] = elo
+        data["fields"] = list(fields)
+        result = ChampionGGStatsListDto(data)
+        self._put_cached(ChampionGGStatsListDto, (patch, elo, fields), result)
+        self._list_indexes[(patch, elo, fields)] = _ChampionListIndex(result)
+        return result
+
+    def _get_champion_list_index(self, ggs: ChampionGGStatsListDto) -> "_ChampionListIndex":
+        key = (ggs["patch"], ggs["elo"], tuple(ggs.get("fields", DEFAULT_CHAMPION_DATA)))
+        index = self._list_indexes.get(key, None)
+        if index is None or index.source is not ggs:
+            index = _ChampionListIndex(ggs)
+            self._list_indexes[key] = index
+        return index
+
+    def find_champion_role(self, ggs: ChampionGGStatsListDto, id: int, role: str) -> ChampionGGStatsDto:
+        """Looks up champion `id` in `role` in a champion list, or raises a NotFoundError."""
+        gg = self._get_champion_list_index(ggs).by_champion_role.get((id, role), None)
+        if gg is None:
+            raise NotFoundError
+        return ChampionGGStatsDto(gg)
+
+    def find_champion(self, ggs: ChampionGGStatsListDto, id: int) -> MultipleChampionGGStatsDto:
+        """Looks up every role of champion `id` in a champion list, or raises a NotFoundError."""
+        gg = self._get_champion_list_index(ggs).by_champion.get(id, None)
+        if gg is None:
+            raise NotFoundError
+        return MultipleChampionGGStatsDto({"data": list(gg), "championId": id})
 
     _validate_get_gg_champion_role_query = Query. \
         has("id").as_(int).also. \
         has("patch").as_(str).also. \
         has("role").as_(str).also. \
-        can_have("elo").with_default(lambda *args, **kwargs: "PLATINUM_DIAMOND_MASTER_CHALLENGER", supplies_type=str)
+        can_have("elo").with_default(lambda *args, **kwargs: "PLATINUM_DIAMOND_MASTER_CHALLENGER", supplies_type=str).also. \
+        can_have("fields")
 
     @get.register(ChampionGGStatsDto)
     @validate_query(_validate_get_gg_champion_role_query, convert_region_to_platform)
@@ -107,21 +510,13 @@ class ChampionGG(DataSource):
         if "name" in items_query:
             items_query.pop("name")
         ggs = context[context.Keys.PIPELINE].get(ChampionGGStatsListDto, query=items_query)
-
-        def find_matching_attribute(list_of_dtos, attrs):
-            for dto in list_of_dtos:
-                if all(dto.get(attrname, None) == attrvalue for attrname, attrvalue in attrs.items()):
-                    return dto
-
-        gg = find_matching_attribute(ggs["data"], {"championId": id, "role": role})
-        if gg is None:
-            raise NotFoundError
-        return ChampionGGStatsDto(gg)
+        return self.find_champion_role(ggs, id, role)
 
     _validate_get_gg_champion_query = Query. \
         has("id").as_(int).also. \
         has("patch").as_(str).also. \
-        can_have("elo").with_default(lambda *args, **kwargs: "PLATINUM_DIAMOND_MASTER_CHALLENGER", supplies_type=str)
+        can_have("elo").with_default(lambda *args, **kwargs: "PLATINUM_DIAMOND_MASTER_CHALLENGER", supplies_type=str).also. \
+        can_have("fields")
 
     @get.register(MultipleChampionGGStatsDto)
     @validate_query(_validate_get_gg_champion_query, convert_region_to_platform)
@@ -134,21 +529,68 @@ class ChampionGG(DataSource):
         if "name" in items_query:
             items_query.pop("name")
         ggs = context[context.Keys.PIPELINE].get(ChampionGGStatsListDto, query=items_query)
+        return self.find_champion(ggs, id)
 
-        def find_matching_attribute(list_of_dtos, attrs):
-            dtos = []
-            for dto in list_of_dtos:
-                if all(dto.get(attrname, None) == attrvalue for attrname, attrvalue in attrs.items()):
-                    dtos.append(dto)
-            if dtos:
-                return dtos
-            else:
-                return None
+    _validate_get_many_gg_champion_query = Query. \
+        has("ids").as_(Iterable).also. \
+        has("patch").as_(str).also. \
+        can_have("elo").with_default(lambda *args, **kwargs: "PLATINUM_DIAMOND_MASTER_CHALLENGER", supplies_type=str).also. \
+        can_have("fields")
 
-        gg = find_matching_attribute(ggs["data"], {"championId": id})
-        if gg is None:
-            raise NotFoundError
-        return MultipleChampionGGStatsDto({"data": gg, "championId": id})
+    @get_many.register(MultipleChampionGGStatsDto)
+    @validate_query(_validate_get_many_gg_champion_query, convert_region_to_platform)
+    def get_many_champions_from_list(self, query: MutableMapping[str, Any], context: PipelineContext = None) -> Generator[MultipleChampionGGStatsDto, None, None]:
+        """Looks up each of the champions `ids` in one champion list, in order. Champions that aren't in the list have no rows."""
+        ids = query.pop("ids")
+
+        items_query = copy.deepcopy(query)
+        if "name" in items_query:
+            items_query.pop("name")
+        ggs = context[context.Keys.PIPELINE].get(ChampionGGStatsListDto, query=items_query)
+        by_champion = self._get_champion_list_index(ggs).by_champion
+        for id in ids:
+            yield MultipleChampionGGStatsDto({"data": list(by_champion.get(id, ())), "championId": id})
+
+    @get.register(ChampionGGStatsTable)
+    @validate_query(_validate_get_gg_champion_list_query, convert_region_to_platform)
+    def get_gg_champion_table(self, query: MutableMapping[str, Any], context: PipelineContext = None) -> ChampionGGStatsTable:
+        ggs = context[context.Keys.PIPELINE].get(ChampionGGStatsListDto, query=query)
+        return self._get_champion_list_index(ggs).table
+
+    def fetch_elos(self, patch: str, elos: Iterable[str] = None, fields: Iterable[str] = None, max_workers: int = None) -> Dict[str, ChampionGGStatsListDto]:
+        """Returns the champion list for each of `elos` (by default, every elo), keyed by elo.
+
+        Lists that aren't cached are requested concurrently from up to `max_workers` threads, which defaults to the
+        number of requests the rate limits allow in their shortest window.
+        """
+        elos = list(ELOS if elos is None else elos)
+        for elo in elos:
+            if not elo in ELOS:
+                raise ValueError("`elo` must be one of {}. Got \"{}\"".format(ELOS, elo))
+        if max_workers is None:
+            max_workers = min(window_permits for window_seconds, window_permits in self._rate_limits)
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(elos)))) as executor:
+            futures = {elo: executor.submit(self.fetch_champion_list, patch=patch, elo=elo, fields=fields) for elo in elos}
+        return {elo: future.result() for elo, future in futures.items()}
+
+    def get_elo_table(self, patch: str, elos: Iterable[str] = None, fields: Iterable[str] = None, max_workers: int = None) -> ChampionGGEloTable:
+        """Returns the champion lists for `elos` (by default, every elo) merged into one table, fetching them concurrently.
+
+        `gamesPlayed` is always requested, to weight the table's aggregates.
+        """
+        fields = set(self._projection(fields)) | {"gamesPlayed"}
+        lists = self.fetch_elos(patch, elos=elos, fields=fields, max_workers=max_workers)
+        return ChampionGGEloTable.from_tables({elo: self._get_champion_list_index(ggs).table for elo, ggs in lists.items()})
+
+    _validate_get_gg_elo_table_query = Query. \
+        has("patch").as_(str).also. \
+        can_have("elos").also. \
+        can_have("fields")
+
+    @get.register(ChampionGGEloTable)
+    @validate_query(_validate_get_gg_elo_table_query, convert_region_to_platform)
+    def get_gg_elo_table(self, query: MutableMapping[str, Any], context: PipelineContext = None) -> ChampionGGEloTable:
+        return self.get_elo_table(query["patch"], elos=query.get("elos", None), fields=query.get("fields", None))
 
     ############
     # Matchups #
@@ -163,44 +605,412 @@ class ChampionGG(DataSource):
     @get.register(ChampionGGMatchupListDto)
     @validate_query(_validate_get_championgg_matchup_list_query, convert_region_to_platform)
     def get_championgg_matchups(self, query: MutableMapping[str, Any], context: PipelineContext = None) -> ChampionGGMatchupListDto:
-        if not query["elo"] in ELOS:
-            raise ValueError("`elo` must be one of {}. Got \"{}\"".format(ELOS, query["elo"]))
+        data = self.fetch_matchups(id=query["id"], patch=query["patch"], elo=query["elo"], role=query["role"])
+        data = ChampionGGMatchupListDto(data)
+        return data
+
+    @staticmethod
+    def _check_matchup_query(elo: str, role: str) -> str:
+        if not elo in ELOS:
+            raise ValueError("`elo` must be one of {}. Got \"{}\"".format(ELOS, elo))
         # Need to to some role name transformations here for consistency between Riot's role names and champion.gg's role names
-        convert_role = {"TOP": "TOP",
-                        "JUNGLE": "JUNGLE",
-                        "MIDDLE": "MIDDLE",
-                        "DUO_SUPPORT": "ADCSUPPORT",
-                        "DUO_CARRY": "DUO_CARRY"
-        }
-        query["role"] = convert_role[query["role"]]
-        if not query["role"] in ROLES:
-            raise ValueError("`role` must be one of {}. Got \"{}\"".format(ROLES, query["role"]))
+        role = MATCHUP_ROLES.get(role, role)
+        if not role in ROLES:
+            raise ValueError("`role` must be one of {}. Got \"{}\"".format(ROLES, role))
+        return role
 
+    def fetch_matchups(self, id: int, patch: str, elo: str, role: str) -> dict:
+        """Returns the data of champion `id`'s matchup list in `role`, from the cache if it's there."""
+        role = self._check_matchup_query(elo, role)
+        with self._metrics.time("fetch.matchups"):
+            try:
+                data = self._get_cached(ChampionGGMatchupListDto, (id, patch, elo, role))
+            except KeyError:
+                data = self._coalesce(ChampionGGMatchupListDto, (id, patch, elo, role), lambda: self._load_matchups(id, patch, elo, role))
+
+        self._add_to_matchup_matrix(data, id=id, patch=patch, elo=elo, role=role)
+        return data
+
+    def _load_matchups(self, id: int, patch: str, elo: str, role: str) -> dict:
+        # Another thread may have finished loading the matchups since the cache was checked
         try:
-            data = self._cached_data[(self.get_championgg_matchups, (query["id"], query["patch"], query["elo"], query["role"]))]
+            return self._get_cached(ChampionGGMatchupListDto, (id, patch, elo, role))
         except KeyError:
-            url, params = get_champion_matchup_url(api_key=self._key, **{k: v for k, v in query.items() if k != "patch"})
-            params = "&".join(["{key}={value}".format(key=key, value=value) for key, value in params.items()])
-            try:
-                data, response_headers = self._client.get(url, params, rate_limiters=[self._rate_limiter], connection=None, encode_parameters=False)
-            except HTTPError as error:
-                if error.code == 403:
-                    raise HTTPError(message="Forbidden", code=error.code)
-                raise NotFoundError(str(error)) from error
-
-            for datum in data:
-                datum.pop("_id")
-            data = {"data": data}
-            data["patch"] = query["patch"]
-            data["elo"] = query["elo"]
-            for d in data["data"]:
-                d["elo"] = query["elo"]
-            data["id"] = query["id"]
-            data["role"] = query["role"]
-            self._cached_data[(self.get_championgg_matchups, (query["id"], query["patch"], query["elo"], query["role"]))] = data
-        data = ChampionGGMatchupListDto(data)
+            pass
+        url, params = get_champion_matchup_url(api_key=self._key, api_url=self._api_url, id=id, role=role, elo=elo)
+        stream = self._matchup_stream(elo)
+        data, response_headers = self._stream(url, params, stream)
+        return self._store_matchups(data, response_headers, id=id, patch=patch, elo=elo, role=role, digest=stream.digest)
+
+    @staticmethod
+    def _matchup_stream(elo: str) -> JSONArrayStream:
+        # Matchup lists can be several megabytes, so each matchup is put into its final form as soon as it's decoded
+        def compact(datum: dict) -> dict:
+            datum.pop("_id", None)
+            datum["elo"] = elo
+            return datum
+        return JSONArrayStream(compact)
+
+    def _store_matchups(self, data: list, response_headers: Mapping[str, str], id: int, patch: str, elo: str, role: str, digest: str = None) -> dict:
+        self._remember_validators(ChampionGGMatchupListDto, (id, patch, elo, role), data, response_headers, digest=digest)
+        data = {"data": data}
+        data["patch"] = patch
+        data["elo"] = elo
+        data["id"] = id
+        data["role"] = role
+        self._put_cached(ChampionGGMatchupListDto, (id, patch, elo, role), data)
         return data
 
+    def get_many_matchups(self, champion_roles: Iterable[Tuple[int, str]], patch: str, elo: str = "PLATINUM_DIAMOND_MASTER_CHALLENGER") -> List[ChampionGGMatchupListDto]:
+        """Returns the matchups for each `(champion id, role)` pair, in order.
+
+        Matchup lists that aren't cached are requested in parallel from the calling thread with a curl multi handle,
+        reusing the data source's pooled connections and respecting its rate limits. A data source given an
+        `http_client` requests them one at a time through that client instead. Lists that another thread is already
+        requesting are waited for instead.
+        """
+        keys = [(id, self._check_matchup_query(elo, role)) for id, role in champion_roles]
+        results = {}
+        missing = []
+        for id, role in dict.fromkeys(keys):
+            try:
+                results[(id, role)] = self._get_cached(ChampionGGMatchupListDto, (id, patch, elo, role))
+            except KeyError:
+                missing.append((id, role))
+
+        flights = {}
+        waiting = {}
+        for id, role in missing:
+            flight, leader = self._flights.claim((ChampionGGMatchupListDto, (id, patch, elo, role)))
+            if leader:
+                flights[(id, role)] = flight
+            else:
+                self._metrics.increment("coalesced")
+                waiting[(id, role)] = flight
+
+        errors = []
+        requested = []
+        try:
+            for id, role in flights:
+                # Lists another worker process sharing the cache is requesting are waited for after this batch
+                if not self._shared or self._disk_cache.claim(ChampionGGMatchupListDto, (id, patch, elo, role), seconds=SHARED_CLAIM_SECONDS):
+                    requested.append((id, role))
+            if requested:
+                self._check_key()
+            requests = [get_champion_matchup_url(api_key=self._key, api_url=self._api_url, id=id, role=role, elo=elo) for id, role in requested]
+            streams = [self._matchup_stream(elo) for _ in requested]
+            with self._metrics.time("request.many_matchups"):
+                responses = self._stream_many(requests, streams)
+            for (id, role), stream, response in zip(requested, streams, responses):
+                flight = flights.pop((id, role))
+                if isinstance(response, Exception):
+                    error = self._convert_error(response) if isinstance(response, HTTPError) else response
+                    errors.append(error)
+                    self._flights.resolve((ChampionGGMatchupListDto, (id, patch, elo, role)), flight, error=error)
+                    continue
+                data, response_headers = response
+                results[(id, role)] = self._store_matchups(data, response_headers, id=id, patch=patch, elo=elo, role=role, digest=stream.digest)
+                self._flights.resolve((ChampionGGMatchupListDto, (id, patch, elo, role)), flight, result=results[(id, role)])
+        except BaseException as error:
+            # Don't leave other threads waiting for requests that will never finish
+            for (id, role), flight in flights.items():
+                self._flights.resolve((ChampionGGMatchupListDto, (id, patch, elo, role)), flight, error=error)
+            raise
+        finally:
+            if self._shared:
+                for id, role in requested:
+                    self._disk_cache.release(ChampionGGMatchupListDto, (id, patch, elo, role))
+
+        try:
+            while flights:
+                (id, role), flight = flights.popitem()
+                key = (ChampionGGMatchupListDto, (id, patch, elo, role))
+                try:
+                    results[(id, role)] = self._flights.run(key, flight, lambda: self._fetch_once(*key, lambda: self._load_matchups(id, patch, elo, role)))
+                except Exception as error:
+                    errors.append(error)
+        except BaseException as error:
+            for (id, role), flight in flights.items():
+                self._flights.resolve((ChampionGGMatchupListDto, (id, patch, elo, role)), flight, error=error)
+            raise
+
+        for key, flight in waiting.items():
+            try:
+                results[key] = flight.wait()
+            except Exception as error:
+                errors.append(error)
+        if errors:
+            raise errors[0]
+
+        for (id, role), data in results.items():
+            self._add_to_matchup_matrix(data, id=id, patch=patch, elo=elo, role=role)
+        return [ChampionGGMatchupListDto(results[key]) for key in keys]
+
+    def _add_to_matchup_matrix(self, data: dict, id: int, patch: str, elo: str, role: str) -> None:
+        matrix = self._get_matchup_matrix(patch, elo, role)
+        if id not in matrix.added:
+            matrix.add(data)
+
+    def _get_matchup_matrix(self, patch: str, elo: str, role: str) -> ChampionGGMatchupMatrix:
+        try:
+            return self._matchup_matrices[(patch, elo, role)]
+        except KeyError:
+            # setdefault so that threads racing to create the matrix all end up sharing one
+            return self._matchup_matrices.setdefault((patch, elo, role), ChampionGGMatchupMatrix(patch=patch, elo=elo, role=role))
+
+    _validate_get_championgg_matchup_matrix_query = Query. \
+        has("patch").as_(str).also. \
+        has("role").as_(str).also. \
+        can_have("elo").with_default(lambda *args, **kwargs: "PLATINUM_DIAMOND_MASTER_CHALLENGER", supplies_type=str)
+
+    @get.register(ChampionGGMatchupMatrix)
+    @validate_query(_validate_get_championgg_matchup_matrix_query, convert_region_to_platform)
+    def get_championgg_matchup_matrix(self, query: MutableMapping[str, Any], context: PipelineContext = None) -> ChampionGGMatchupMatrix:
+        """Returns the matchup matrix built from every matchup list fetched so far for the patch, elo, and role.
+
+        Use `prefetch` to fill it with every champion's matchups. Matchups in the data source's cache or snapshot are added
+        to it when it's asked for, so a matrix dropped when one of its lists was evicted from the cache is rebuilt.
+        """
+        if not query["elo"] in ELOS:
+            raise ValueError("`elo` must be one of {}. Got \"{}\"".format(ELOS, query["elo"]))
+        role = MATCHUP_ROLES.get(query["role"], query["role"])
+        if not role in ROLES:
+            raise ValueError("`role` must be one of {}. Got \"{}\"".format(ROLES, role))
+        matrix = self._get_matchup_matrix(query["patch"], query["elo"], role)
+        for type, key in self._cached_data.keys():
+            if type is ChampionGGMatchupListDto and key[1:] == (query["patch"], query["elo"], role) and key[0] not in matrix.added:
+                data = self._cached_data.get((type, key), None)
+                if data is not None:
+                    self._add_to_matchup_matrix(data, *key)
+        if self._snapshot is not None:
+            for type, key in self._snapshot.keys():
+                if type is ChampionGGMatchupListDto and key[1:] == (query["patch"], query["elo"], role) and key[0] not in matrix.added:
+                    self.fetch_matchups(*key)
+        return matrix
+
+    ###########
+    # Refresh #
+    ###########
+
+    @staticmethod
+    def _encode_for_hash(row: Any) -> bytes:
+        return json.dumps(row, sort_keys=True).encode("utf-8")
+
+    @staticmethod
+    def _hash(rows: Iterable[Any]) -> str:
+        # Rows are hashed one at a time so a list hashes the same whether it arrived in one page or several
+        digest = hashlib.sha1()
+        for row in rows:
+            digest.update(ChampionGG._encode_for_hash(row))
+        return digest.hexdigest()
+
+    def _remember_validators(self, type: Type[T], key: Hashable, data: Any, response_headers: Mapping[str, str], digest: str = None, pages: List[dict] = None) -> None:
+        if self._cached_data.expiration(type) == 0:
+            # The entry won't be cached, so there will be nothing to revalidate
+            return
+        validators = {"hash": digest if digest is not None else self._hash(data)}
+        for header in ("ETag", "Last-Modified"):
+            if header in response_headers:
+                validators[header] = response_headers[header]
+        if pages is not None:
+            validators["pages"] = pages
+        self._validators[(type, key)] = validators
+
+    @staticmethod
+    def _page_validators(skip: int, count: int, response_headers: Mapping[str, str]) -> dict:
+        # Each page of a champion list is revalidated on its own, and a page that hasn't changed is taken from the cache
+        validators = {"skip": skip, "count": count}
+        for header in ("ETag", "Last-Modified"):
+            if header in response_headers:
+                validators[header] = response_headers[header]
+        return validators
+
+    @staticmethod
+    def _conditional_headers(validators: Mapping[str, Any]) -> Dict[str, str]:
+        headers = {}
+        if "ETag" in validators:
+            headers["If-None-Match"] = validators["ETag"]
+        if "Last-Modified" in validators:
+            headers["If-Modified-Since"] = validators["Last-Modified"]
+        return headers
+
+    def refresh(self, patch: str = None) -> Dict[Tuple, bool]:
+        """Asks champion.gg whether any cached champion list or matchup list (for `patch`, or for every patch) changed.
+
+        Each entry (each page of a champion list) is revalidated with a conditional request using the ETag or
+        Last-Modified header of its last response. If the server doesn't support conditional requests, the new
+        response is compared to a hash of the last one, or of the cached entry if it was loaded from the disk cache or
+        a snapshot. Entries only get re-parsed and rebuilt if their data changed.
+
+        Returns whether each revalidated entry changed, keyed by `(dto type, cache key)`.
+        """
+        changed = {}
+        for type, key in self._cached_data.keys():
+            if type is ChampionGGStatsListDto:
+                if key in self._partial_lists:
+                    continue
+                entry_patch = key[0]
+            elif type is ChampionGGMatchupListDto:
+                entry_patch = key[1]
+            else:
+                continue
+            if patch is None or entry_patch == patch:
+                changed[(type, key)] = self._revalidate(type, key)
+        return changed
+
+    def _revalidate(self, type: Type[T], key: Hashable) -> bool:
+        cached = self._cached_data.get((type, key), None)
+        if cached is None:
+            # Evicted since `refresh` listed it
+            return False
+        if type is ChampionGGStatsListDto:
+            return self._revalidate_champion_list(cached, *key)
+
+        id, patch, elo, role = key
+        url, params = get_champion_matchup_url(api_key=self._key, api_url=self._api_url, id=id, role=role, elo=elo)
+        validators = self._validators.get((type, key), None)
+        stream = self._matchup_stream(elo)
+        data, response_headers = self._stream(url, params, stream, headers=self._conditional_headers(validators or {}))
+        if not isinstance(data, list):
+            # 304 Not Modified has no body
+            return False
+        if validators is not None:
+            unchanged = stream.digest == validators["hash"]
+        else:
+            # Matchups loaded from the disk cache or a snapshot have no response to compare to, so their rows are compared
+            unchanged = self._hash(data) == self._hash(cached["data"])
+        if unchanged:
+            self._remember_validators(type, key, data, response_headers, digest=stream.digest)
+            return False
+
+        data = self._store_matchups(data, response_headers, id=id, patch=patch, elo=elo, role=role, digest=stream.digest)
+        self._get_matchup_matrix(patch, elo, role).add(data)
+        return True
+
+    def _revalidate_champion_list(self, cached: ChampionGGStatsListDto, patch: str, elo: str, fields: Tuple[str, ...]) -> bool:
+        validators = self._validators.get((ChampionGGStatsListDto, (patch, elo, fields)), None)
+        if validators is None:
+            # A list loaded from the disk cache or a snapshot has no responses to revalidate, so it's compared by hash
+            validators = {"hash": self._hash(cached["data"]), "pages": []}
+        old_pages = {page["skip"]: page for page in validators["pages"]}
+
+        rows = []
+        page_validators = []
+        modified = False
+        limit = self._page_limit(CHAMPION_LIST_PAGE_SIZE)
+        skip = 0
+        while True:
+            old = old_pages.get(skip, {})
+            headers = self._conditional_headers(old)
+            url, params = get_champion_url(api_key=self._key, api_url=self._api_url, elo=elo, fields=fields, limit=limit, skip=skip)
+            with self._metrics.time("request.champion_list"):
+                page, response_headers = self._request(url, params, headers=headers)
+            if isinstance(page, list):
+                for datum in page:
+                    datum.pop("_id")
+                modified = True
+                page_validators.append(self._page_validators(skip, len(page), response_headers))
+            elif headers:
+                # 304 Not Modified has no body, so the page's rows are the cached ones
+                page = cached["data"][skip:skip + old["count"]]
+                page_validators.append(old)
+            else:
+                raise ValueError("Expected a JSON array, got {}".format(type(page).__name__))
+            rows.extend(page)
+            if len(page) < limit:
+                break
+            skip += limit
+
+        digest = self._hash(rows) if modified else validators["hash"]
+        self._remember_validators(ChampionGGStatsListDto, (patch, elo, fields), None, {}, digest=digest, pages=page_validators)
+        if digest == validators["hash"]:
+            return False
+        self._store_champion_list(rows, patch=patch, elo=elo, fields=fields)
+        return True
+
+    ############
+    # Prefetch #
+    ############
+
+    def prefetch(self, patch: str, elos: Iterable[str] = None, max_workers: int = None, progress: Callable[[int, int], None] = None) -> Dict[Tuple, Exception]:
+        """Loads the champion list and every champion's matchups for each elo on `patch` into the cache.
+
+        Requests are made from `max_workers` threads, which defaults to the number of requests the rate limits allow
+        in their shortest window; the rate limiters hold back any request that would exceed them. `progress` is called
+        with the number of completed and scheduled requests after each request finishes.
+
+        Returns the exceptions raised by any requests that failed, keyed by `(elo,)` for champion lists and by
+        `(id, elo, role)` for matchups.
+        """
+        if elos is None:
+            elos = ELOS
+        if max_workers is None:
+            max_workers = min(window_permits for window_seconds, window_permits in self._rate_limits)
+
+        failures = {}
+        completed = 0
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            pending = {executor.submit(self.fetch_champion_list, patch=patch, elo=elo): (elo,) for elo in elos}
+            total = len(pending)
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    key = pending.pop(future)
+                    completed += 1
+                    try:
+                        result = future.result()
+                    except Exception as error:
+                        failures[key] = error
+                        continue
+                    if len(key) == 1:
+                        elo = key[0]
+                        for id, role in self._get_champion_list_index(result).by_champion_role:
+                            if role not in MATCHUP_ROLES:
+                                continue
+                            pending[executor.submit(self.fetch_matchups, id=id, patch=patch, elo=elo, role=role)] = (id, elo, role)
+                            total += 1
+                    if progress is not None:
+                        progress(completed, total)
+        return failures
+
+    #############
+    # Snapshots #
+    #############
+
+    def export_snapshot(self, path: str, patch: str) -> int:
+        """Writes every champion list and matchup list this data source has for `patch` to a snapshot file.
+
+        Returns the number of lists written. Use `prefetch` first to include every elo and champion. The snapshot can
+        be served by another data source, which needs no API key, with the `snapshot_path` setting.
+        """
+        return write_snapshot(path, self._patch_entries(patch))
+
+    def _patch_entries(self, patch: str) -> Iterator[Tuple[type, Any]]:
+        """Yields every champion list and matchup list this data source has for `patch`, as `(type, dto)` pairs."""
+        keys = self._cached_data.keys()
+        if self._snapshot is not None:
+            keys += [key for key in self._snapshot.keys() if key not in self._cached_data]
+        for type, key in dict.fromkeys(keys):
+            if (type is ChampionGGStatsListDto and key[0] == patch) or (type is ChampionGGMatchupListDto and key[1] == patch):
+                try:
+                    yield type, self._get_cached(type, key)
+                except KeyError:
+                    pass
+
+    def record_history(self, history: ChampionGGHistory, patch: str) -> int:
+        """Adds every champion list and matchup list this data source has for `patch` to `history`, and returns how many were added.
+
+        Use `prefetch` first to include every elo and champion.
+        """
+        count = 0
+        for type, dto in self._patch_entries(patch):
+            if type is ChampionGGStatsListDto:
+                history.record_champion_list(dto)
+            else:
+                history.record_matchups(dto)
+            count += 1
+        return count
+
     ##########
     # Ghosts #
     ##########
@@ -1,7 +1,18 @@
 from cassiopeia.dto.common import DtoObject
 
 
-class ChampionGGStatsListDto(DtoObject):
+class _ListDto(DtoObject):
+    def __str__(self) -> str:
+        # The pipeline formats every result it returns into its log messages, and formatting a whole list of rows
+        # takes far longer than looking one champion up in it
+        attributes = ", ".join("{}={}".format(name, value) for name, value in self.items() if name != "data")
+        return "{}({}, {} rows)".format(type(self).__name__, attributes, len(self.get("data", ())))
+
+    # Lists of results (from `get_many`) are formatted with each result's repr
+    __repr__ = __str__
+
+
+class ChampionGGStatsListDto(_ListDto):
     pass
 
 
@@ -9,7 +20,7 @@ class ChampionGGStatsDto(DtoObject):
     pass
 
 
-class ChampionGGMatchupListDto(DtoObject):
+class ChampionGGMatchupListDto(_ListDto):
     pass
 
 
@@ -17,5 +28,5 @@ class ChampionGGMatchupDto(DtoObject):
     pass
 
 
-class MultipleChampionGGStatsDto(DtoObject):
+class MultipleChampionGGStatsDto(_ListDto):
     pass
@@ -1,14 +1,22 @@
-from typing import Optional
+from typing import Iterable, Optional
 
+# The base url of the champion.gg API
+API_URL = 'https://api.champion.gg/v2'
 ROLES = ['TOP', 'JUNGLE', 'MIDDLE', 'SYNERGY', 'ADCSUPPORT', 'DUO_CARRY']
 ELOS = ['BRONZE', 'SILVER', 'GOLD', 'PLATINUM', 'PLATINUM_DIAMOND_MASTER_CHALLENGER']
+# The `champData` fields that can be requested from the champions endpoint
+CHAMPION_DATA = ['winRate', 'playRate', 'percentRolePlayed', 'banRate', 'kda', 'damage', 'minions', 'wins', 'gamesPlayed',
+                 'wards', 'positions', 'normalized', 'averageGames', 'overallPerformanceScore', 'killingSprees', 'hashes',
+                 'maxMins', 'matchups', 'goldEarned', 'totalHeal']
+# The `champData` fields `get_champion_url` requests by default
+DEFAULT_CHAMPION_DATA = ('banRate', 'damage', 'goldEarned', 'hashes', 'kda', 'minions', 'percentRolePlayed', 'playRate', 'totalHeal', 'winRate')
 
 
-def get_site_information_url(api_key: str, elo: str = 'PLATINUM_DIAMOND_MASTER_CHALLENGER'):
+def get_site_information_url(api_key: str, elo: str = 'PLATINUM_DIAMOND_MASTER_CHALLENGER', api_url: str = API_URL):
     elo = elo.upper()
     if elo not in ELOS:
         raise ValueError(f"`elo` must be one of: {', '.join(ELOS)}. Got {elo}.")
-    url = f"https://api.champion.gg/v2/general"
+    url = f"{api_url}/general"
     params = {
         'elo': elo,
         'api_key': api_key
@@ -16,11 +24,11 @@ def get_site_information_url(api_key: str, elo: str = 'PLATINUM_DIAMOND_MASTER_C
     return url, params
 
 
-def get_overall_champion_url(api_key: str, elo: str = 'PLATINUM_DIAMOND_MASTER_CHALLENGER'):
+def get_overall_champion_url(api_key: str, elo: str = 'PLATINUM_DIAMOND_MASTER_CHALLENGER', api_url: str = API_URL):
     elo = elo.upper()
     if elo not in ELOS:
         raise ValueError(f"`elo` must be one of: {', '.join(ELOS)}. Got {elo}.")
-    url = f"https://api.champion.gg/v2/overall"
+    url = f"{api_url}/overall"
     params = {
         'elo': elo,
         'api_key': api_key
@@ -52,12 +60,14 @@ def get_champion_url(api_key: str,
                      matchups: bool = False,  # dict
                      #runes: bool = True, skills: bool = True, first_items: bool = True, final_items: bool = True, trinkets:  bool = True, summoners: bool = False, grouped_wins: bool = False,
                      champion: Optional[int] = None,
+                     fields: Optional[Iterable[str]] = None,  # `champData` field names; overrides the flags above
+                     limit: int = 500,
+                     skip: int = 0,
+                     api_url: str = API_URL,
                      ):
     elo = elo.upper()
     if elo not in ELOS:
         raise ValueError(f"`elo` must be one of: {', '.join(ELOS)}. Got {elo}.")
-    num_results = 500
-    skip = 0
     sort = 'winRate-desc'
 
     champion_data = {'role'}
@@ -88,15 +98,20 @@ def get_champion_url(api_key: str,
     #if trinkets: champion_data.add('trinkets')
     #if summoners: champion_data.add('summoners')
     #if grouped_wins: champion_data.add('groupedWins')
+    if fields is not None:
+        fields = set(fields)
+        if not fields.issubset(CHAMPION_DATA):
+            raise ValueError(f"`fields` must be a subset of: {', '.join(CHAMPION_DATA)}. Got {', '.join(sorted(fields))}.")
+        champion_data = {'role'} | fields
 
     if champion is None:
-        url = f"https://api.champion.gg/v2/champions"
+        url = f"{api_url}/champions"
     else:
-        url = f"https://api.champion.gg/v2/champions/{champion}"
+        url = f"{api_url}/champions/{champion}"
     params = {
         'elo': elo,
         'champData': ','.join(champion_data),
-        'limit': num_results,
+        'limit': limit,
         'skip': skip,
         'sort': sort,
         'api_key': api_key,
@@ -104,7 +119,7 @@ def get_champion_url(api_key: str,
     return url, params
 
 
-def get_champion_matchup_url(api_key: str, id: int, role: Optional[str] = None, elo: str = 'PLATINUM_DIAMOND_MASTER_CHALLENGER', num_results: int = 99999):
+def get_champion_matchup_url(api_key: str, id: int, role: Optional[str] = None, elo: str = 'PLATINUM_DIAMOND_MASTER_CHALLENGER', num_results: int = 99999, api_url: str = API_URL):
     elo = elo.upper()
     if elo not in ELOS:
         raise ValueError(f"`elo` must be one of: {', '.join(ELOS)}. Got {elo}.")
@@ -116,10 +131,10 @@ def get_champion_matchup_url(api_key: str, id: int, role: Optional[str] = None,
         'api_key': api_key
     }
     if role is None:
-        url = f"https://api.champion.gg/v2/champions/{id}/matchups"
+        url = f"{api_url}/champions/{id}/matchups"
     else:
         role = role.upper()
         if role not in ['TOP', 'JUNGLE', 'MIDDLE', 'SYNERGY', 'ADCSUPPORT', 'DUO_CARRY']:
             raise ValueError("`role` must be one of: TOP, JUNGLE, MIDDLE, SYNERGY, ADCSUPPORT, DUO_CARRY")
-        url = f"https://api.champion.gg/v2/champions/{id}/{role}/matchups"
+        url = f"{api_url}/champions/{id}/{role}/matchups"
     return url, params
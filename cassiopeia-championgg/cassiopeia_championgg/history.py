@@ -0,0 +1,146 @@
+from typing import Iterable, List, Mapping, Tuple, Union
+from enum import Enum
+from threading import Lock
+import os
+import sqlite3
+
+import numpy as np
+
+from .dto import ChampionGGStatsListDto
+from .table import ChampionGGStatsTable
+from .data import Role
+
+DEFAULT_ELO = "PLATINUM_DIAMOND_MASTER_CHALLENGER"
+
+
+def _patch_key(patch: str) -> Tuple[int, ...]:
+    """Orders patch names numerically, so that "8.10" comes after "8.9"."""
+    return tuple(int(part) if part.isdigit() else -1 for part in patch.split("."))
+
+
+def _role(role: Union[Role, str]) -> str:
+    return role.value if isinstance(role, Enum) else role
+
+
+class ChampionGGHistory(object):
+    """An append-only store of champion.gg champion lists and matchups from many patches, in a SQLite database file.
+
+    Champion stats are indexed by `(championId, role, elo, patch)`, so a champion's history is one indexed read, and
+    by `(elo, field, patch)`, so comparing two patches reads only those patches:
+
+        history.series(99, Role.middle, "winRate")
+        history.diff("8.1", "8.2", "winRate", role=Role.middle).top(10, "delta")
+
+    A patch's list or matchups are only recorded once; recording them again leaves the stored values as they were.
+    """
+    def __init__(self, path: str, timeout: float = 30) -> None:
+        self._path = path
+        self._timeout = timeout
+        self._lock = Lock()
+        self._connection = None
+        self._pid = None
+        with self._lock:
+            self._connect()
+
+    def _connect(self) -> sqlite3.Connection:
+        # A connection can't be used across a fork, so each process opens its own
+        if self._connection is None or self._pid != os.getpid():
+            self._connection = sqlite3.connect(self._path, timeout=self._timeout, check_same_thread=False, isolation_level=None)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("CREATE TABLE IF NOT EXISTS stats (championId INTEGER NOT NULL, role TEXT NOT NULL, elo TEXT NOT NULL, patch TEXT NOT NULL, field TEXT NOT NULL, value REAL NOT NULL, PRIMARY KEY (championId, role, elo, patch, field))")
+            self._connection.execute("CREATE INDEX IF NOT EXISTS stats_by_patch ON stats (elo, field, patch)")
+            self._connection.execute("CREATE TABLE IF NOT EXISTS matchups (championId INTEGER NOT NULL, role TEXT NOT NULL, elo TEXT NOT NULL, patch TEXT NOT NULL, enemyId INTEGER NOT NULL, wins REAL NOT NULL, games REAL NOT NULL, weightedScoreDelta REAL, PRIMARY KEY (championId, role, elo, enemyId, patch))")
+            self._pid = os.getpid()
+        return self._connection
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    def _insert(self, sql: str, rows: Iterable[tuple]) -> None:
+        with self._lock:
+            connection = self._connect()
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                connection.executemany(sql, rows)
+                connection.execute("COMMIT")
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+
+    def record_champion_list(self, ggs: ChampionGGStatsListDto) -> None:
+        """Stores every numeric field of every row in a champion list."""
+        table = ChampionGGStatsTable.from_dto(ggs)
+        patch, elo = ggs["patch"], ggs["elo"]
+        ids = table["championId"].tolist()
+        roles = table["role"].tolist()
+        rows = []
+        for field in table.columns:
+            if field in ("championId", "role"):
+                continue
+            values = table[field]
+            for i in np.flatnonzero(~np.isnan(values)).tolist():
+                rows.append((ids[i], roles[i], elo, patch, field, float(values[i])))
+        self._insert("INSERT OR IGNORE INTO stats (championId, role, elo, patch, field, value) VALUES (?, ?, ?, ?, ?, ?)", rows)
+
+    def record_matchups(self, matchups: Mapping) -> None:
+        """Stores one champion's matchup list, from that champion's side of each matchup."""
+        id = matchups["id"]
+        rows = []
+        for row in matchups["data"]:
+            me, enemy, enemy_id = ("champ1", "champ2", row["champ2_id"]) if row["champ1_id"] == id else ("champ2", "champ1", row["champ1_id"])
+            wins = row[me].get("wins", 0)
+            rows.append((id, matchups["role"], matchups["elo"], matchups["patch"], enemy_id, wins, wins + row[enemy].get("wins", 0), row[me].get("deltaweighedScore", None)))
+        self._insert("INSERT OR IGNORE INTO matchups (championId, role, elo, patch, enemyId, wins, games, weightedScoreDelta) VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def _query(self, sql: str, parameters: tuple) -> List[tuple]:
+        with self._lock:
+            return self._connect().execute(sql, parameters).fetchall()
+
+    def patches(self, elo: str = DEFAULT_ELO) -> List[str]:
+        """The patches with stored champion stats for `elo`, oldest first."""
+        rows = self._query("SELECT DISTINCT patch FROM stats WHERE elo = ?", (elo,))
+        return sorted((patch for patch, in rows), key=_patch_key)
+
+    def series(self, id: int, role: Union[Role, str], field: str = "winRate", elo: str = DEFAULT_ELO) -> Tuple[List[str], np.ndarray]:
+        """Returns the patches a champion has `field` stored for in `role`, oldest first, and its values on them."""
+        rows = self._query("SELECT patch, value FROM stats WHERE championId = ? AND role = ? AND elo = ? AND field = ?", (id, _role(role), elo, field))
+        rows.sort(key=lambda row: _patch_key(row[0]))
+        return [patch for patch, value in rows], np.fromiter((value for patch, value in rows), dtype=np.float64, count=len(rows))
+
+    def diff(self, before: str, after: str, field: str = "winRate", elo: str = DEFAULT_ELO, role: Union[Role, str] = None) -> ChampionGGStatsTable:
+        """Compares `field` between two patches for every champion and role stored on both.
+
+        Returns a `ChampionGGStatsTable` with `championId`, `role`, `before`, `after`, and `delta` (`after - before`)
+        columns, so that, for example, `.top(10, "delta")` gives the biggest gainers.
+        """
+        sql = ("SELECT a.championId, a.role, a.value, b.value FROM stats AS a JOIN stats AS b "
+               "ON b.championId = a.championId AND b.role = a.role AND b.elo = a.elo AND b.field = a.field AND b.patch = ? "
+               "WHERE a.elo = ? AND a.field = ? AND a.patch = ?")
+        parameters = (after, elo, field, before)
+        if role is not None:
+            sql += " AND a.role = ?"
+            parameters += (_role(role),)
+        rows = self._query(sql, parameters)
+        columns = {
+            "championId": np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows)),
+            "role": np.array([row[1] for row in rows], dtype=str),
+            "before": np.fromiter((row[2] for row in rows), dtype=np.float64, count=len(rows)),
+            "after": np.fromiter((row[3] for row in rows), dtype=np.float64, count=len(rows))
+        }
+        columns["delta"] = columns["after"] - columns["before"]
+        return ChampionGGStatsTable(columns, patch=after, elo=elo)
+
+    def matchup_series(self, id: int, enemy: int, role: Union[Role, str], elo: str = DEFAULT_ELO) -> Tuple[List[str], np.ndarray, np.ndarray]:
+        """Returns the patches with stored games between two champions, oldest first, and `id`'s wins and the games on them."""
+        rows = self._query("SELECT patch, wins, games FROM matchups WHERE championId = ? AND role = ? AND elo = ? AND enemyId = ?", (id, _role(role), elo, enemy))
+        rows.sort(key=lambda row: _patch_key(row[0]))
+        return ([row[0] for row in rows],
+                np.fromiter((row[1] for row in rows), dtype=np.float64, count=len(rows)),
+                np.fromiter((row[2] for row in rows), dtype=np.float64, count=len(rows)))
+
+    def close(self) -> None:
+        with self._lock:
+            if self._connection is not None and self._pid == os.getpid():
+                self._connection.close()
+            self._connection = None
@@ -0,0 +1,137 @@
+from typing import Any, Callable, Dict, Iterator
+from contextlib import contextmanager
+from threading import Lock
+import functools
+import time
+
+from merakicommons.ratelimits import RateLimiter
+
+
+class Metrics(object):
+    """A registry of timings, sizes, and counts recorded by the champion.gg plugin.
+
+    Values (durations in seconds, payload sizes in bytes) are aggregated by name into a count, total, and maximum;
+    counters are summed. `snapshot` returns the aggregates, and every listener added with `add_listener` is called
+    as `listener(name, value)` each time a value or count is recorded, so it can be forwarded to a monitoring system:
+
+        from cassiopeia_championgg import metrics
+        metrics.add_listener(lambda name, value: statsd.timing(name, value))
+
+    The names recorded by the `ChampionGG` data source and the transformer are:
+
+        rate_limiter.wait                      time spent waiting for the rate limiter (or for champion.gg's Retry-After)
+        request.champion_list                  a request for a page of the champion list, including decoding it
+        request.matchups                       a request for a matchup list, including decoding it
+        request.many_matchups                  a `get_many_matchups` batch of requests
+        decode.matchups                        decoding a matchup list (as it downloads)
+        strip_ids.champion_list                hashing the rows of a champion list page and removing their `_id`s
+        build.champion_list                    adding a page to the champion list's DTO and index
+        fetch.champion_list, fetch.matchups    getting a list from the cache or champion.gg
+        payload_bytes.champion_list            the size of a champion list page as sent (its Content-Length)
+        payload_bytes.matchups                 the decoded size of a matchup list
+        transform.<method>                     a `ChampionGGTransformer` step on a whole list or champion (rows aren't timed one by one)
+        cache.hit, cache.miss, disk_cache.hit  counts of cache lookups
+        snapshot.hit                           a count of lists built from the snapshot
+        coalesced                              a count of lookups that waited for another thread's (or worker's) identical request
+    """
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self._values = {}
+        self._counters = {}
+        self._listeners = []
+
+    def add_listener(self, listener: Callable[[str, float], None]) -> None:
+        with self._lock:
+            self._listeners = self._listeners + [listener]
+
+    def remove_listener(self, listener: Callable[[str, float], None]) -> None:
+        with self._lock:
+            self._listeners = [other for other in self._listeners if other is not listener]
+
+    def observe(self, name: str, value: float) -> None:
+        with self._lock:
+            try:
+                aggregate = self._values[name]
+            except KeyError:
+                aggregate = self._values[name] = [0, 0.0, value]
+            aggregate[0] += 1
+            aggregate[1] += value
+            if value > aggregate[2]:
+                aggregate[2] = value
+            listeners = self._listeners
+        for listener in listeners:
+            listener(name, value)
+
+    def increment(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+            listeners = self._listeners
+        for listener in listeners:
+            listener(name, amount)
+
+    @contextmanager
+    def time(self, name: str) -> Iterator[None]:
+        """Records how long the body of the `with` block takes, even if it raises."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def timed(self, name: str) -> Callable:
+        """Decorates a function so each call is recorded under `name`."""
+        def decorator(function: Callable) -> Callable:
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return function(*args, **kwargs)
+                finally:
+                    self.observe(name, time.perf_counter() - start)
+            return wrapper
+        return decorator
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Returns `{"values": {name: {"count", "total", "max"}}, "counters": {name: count}}`."""
+        with self._lock:
+            return {
+                "values": {name: {"count": count, "total": total, "max": maximum} for name, (count, total, maximum) in self._values.items()},
+                "counters": dict(self._counters)
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._values = {}
+            self._counters = {}
+
+
+# The registry used by the transformer, and by `ChampionGG` data sources that aren't given their own
+metrics = Metrics()
+
+
+class TimedRateLimiter(RateLimiter):
+    """Wraps a rate limiter, recording how long each request waits to enter it."""
+    def __init__(self, limiter: RateLimiter, metrics: Metrics, name: str = "rate_limiter.wait") -> None:
+        self._limiter = limiter
+        self._metrics = metrics
+        self._name = name
+
+    @property
+    def limiter(self) -> RateLimiter:
+        return self._limiter
+
+    @property
+    def permits_issued(self) -> int:
+        return self._limiter.permits_issued
+
+    def reset_permits_issued(self) -> None:
+        self._limiter.reset_permits_issued()
+
+    def __enter__(self) -> "TimedRateLimiter":
+        start = time.perf_counter()
+        self._limiter.__enter__()
+        self._metrics.observe(self._name, time.perf_counter() - start)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self._limiter.__exit__(exc_type, exc_val, exc_tb)
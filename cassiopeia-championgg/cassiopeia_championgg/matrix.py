@@ -0,0 +1,174 @@
+from typing import Dict, List, Mapping, Set, Tuple, Union
+from threading import Lock
+
+import numpy as np
+
+from .dto import ChampionGGMatchupListDto
+
+
+class ChampionGGMatchupMatrix(object):
+    """Head-to-head results between every pair of champions in one role, for one patch and elo.
+
+    Results are held in dense square arrays with one row and one column per champion: `wins[i, j]` is the number of
+    games champion i won against champion j, `games[i, j]` the number of games they played against each other, and
+    `weighted_score_delta[i, j]` champion i's weighted score delta against champion j. `index` maps champion ids to
+    rows and columns.
+
+    The matrix is filled incrementally with `add` as matchup lists arrive, and lists may be added and read from several
+    threads at once. Adding can grow (replace) the arrays, so the arrays the matrix returns are copies taken under its
+    lock. Both champions' matchup lists contain the games between them, so adding a pair twice overwrites rather
+    than double counts.
+    """
+    def __init__(self, patch: str, elo: str, role: str) -> None:
+        self._patch = patch
+        self._elo = elo
+        self._role = role
+        self._index = {}
+        self._ids = np.zeros(0, dtype=np.int64)
+        self._wins = np.zeros((0, 0), dtype=np.float64)
+        self._games = np.zeros((0, 0), dtype=np.float64)
+        self._weighted_score_delta = np.full((0, 0), np.nan, dtype=np.float64)
+        self._added = set()
+        self._lock = Lock()
+
+    @property
+    def patch(self) -> str:
+        return self._patch
+
+    @property
+    def elo(self) -> str:
+        return self._elo
+
+    @property
+    def role(self) -> str:
+        return self._role
+
+    @property
+    def index(self) -> Mapping[int, int]:
+        with self._lock:
+            return dict(self._index)
+
+    @property
+    def champion_ids(self) -> np.ndarray:
+        with self._lock:
+            return self._ids[:len(self._index)].copy()
+
+    @property
+    def added(self) -> Set[int]:
+        """The ids of the champions whose matchup lists have been added."""
+        return self._added
+
+    @property
+    def wins(self) -> np.ndarray:
+        with self._lock:
+            n = len(self._index)
+            return self._wins[:n, :n].copy()
+
+    @property
+    def games(self) -> np.ndarray:
+        with self._lock:
+            n = len(self._index)
+            return self._games[:n, :n].copy()
+
+    @property
+    def weighted_score_delta(self) -> np.ndarray:
+        with self._lock:
+            n = len(self._index)
+            return self._weighted_score_delta[:n, :n].copy()
+
+    @property
+    def win_rate(self) -> np.ndarray:
+        """`win_rate[i, j]` is champion i's win rate against champion j, or NaN if they haven't played each other."""
+        with self._lock:
+            n = len(self._index)
+            wins = self._wins[:n, :n].copy()
+            games = self._games[:n, :n].copy()
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(games > 0, wins / games, np.nan)
+
+    def _indices(self, ids: List[int]) -> np.ndarray:
+        new = [id for id in dict.fromkeys(ids) if id not in self._index]
+        n = len(self._index) + len(new)
+        if n > len(self._ids):
+            # Grow geometrically so adding champions one list at a time stays cheap
+            capacity = max(n, 2 * len(self._ids))
+            self._ids = np.concatenate([self._ids, np.zeros(capacity - len(self._ids), dtype=np.int64)])
+            self._wins = self._grow(self._wins, capacity, 0)
+            self._games = self._grow(self._games, capacity, 0)
+            self._weighted_score_delta = self._grow(self._weighted_score_delta, capacity, np.nan)
+        for id in new:
+            self._ids[len(self._index)] = id
+            self._index[id] = len(self._index)
+        return np.fromiter((self._index[id] for id in ids), dtype=np.int64, count=len(ids))
+
+    @staticmethod
+    def _grow(array: np.ndarray, capacity: int, fill: float) -> np.ndarray:
+        grown = np.full((capacity, capacity), fill, dtype=array.dtype)
+        grown[:array.shape[0], :array.shape[1]] = array
+        return grown
+
+    def add(self, matchups: Union[ChampionGGMatchupListDto, dict]) -> None:
+        """Adds the games in one champion's matchup list."""
+        rows = matchups["data"]
+        champ1_wins = np.fromiter((row["champ1"].get("wins", 0) for row in rows), dtype=np.float64, count=len(rows))
+        champ2_wins = np.fromiter((row["champ2"].get("wins", 0) for row in rows), dtype=np.float64, count=len(rows))
+        champ1_delta = np.fromiter((row["champ1"].get("deltaweighedScore", np.nan) for row in rows), dtype=np.float64, count=len(rows))
+        champ2_delta = np.fromiter((row["champ2"].get("deltaweighedScore", np.nan) for row in rows), dtype=np.float64, count=len(rows))
+        games = champ1_wins + champ2_wins
+
+        with self._lock:
+            # Both index sets must be taken before writing, since taking one can grow (replace) the arrays
+            champ1 = self._indices([row["champ1_id"] for row in rows])
+            champ2 = self._indices([row["champ2_id"] for row in rows])
+            self._wins[champ1, champ2] = champ1_wins
+            self._wins[champ2, champ1] = champ2_wins
+            self._games[champ1, champ2] = games
+            self._games[champ2, champ1] = games
+            self._weighted_score_delta[champ1, champ2] = champ1_delta
+            self._weighted_score_delta[champ2, champ1] = champ2_delta
+            self._added.add(matchups["id"])
+
+    @staticmethod
+    def _ranked(ids: np.ndarray, wins: np.ndarray, games: np.ndarray, n: int, min_games: int) -> List[Tuple[int, float, int]]:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            win_rates = wins / games
+        candidates = np.flatnonzero((games >= max(min_games, 1)) & ~np.isnan(win_rates))
+        order = candidates[np.argsort(-win_rates[candidates], kind="stable")][:n]
+        return [(int(ids[j]), float(win_rates[j]), int(games[j])) for j in order]
+
+    def counters(self, id: int, n: int = 10, min_games: int = 1) -> List[Tuple[int, float, int]]:
+        """Returns the `n` champions with the highest win rates against `id`, as `(champion id, win rate, games)`."""
+        with self._lock:
+            i = self._index[id]
+            size = len(self._index)
+            ids = self._ids[:size].copy()
+            wins = self._wins[:size, i].copy()
+            games = self._games[:size, i].copy()
+        return self._ranked(ids, wins, games, n, min_games)
+
+    def best_matchups(self, id: int, n: int = 10, min_games: int = 1) -> List[Tuple[int, float, int]]:
+        """Returns the `n` champions `id` has the highest win rates against, as `(champion id, win rate, games)`."""
+        with self._lock:
+            i = self._index[id]
+            size = len(self._index)
+            ids = self._ids[:size].copy()
+            wins = self._wins[i, :size].copy()
+            games = self._games[i, :size].copy()
+        return self._ranked(ids, wins, games, n, min_games)
+
+    def pairwise(self, id: int, enemy: int) -> Dict[str, float]:
+        """Returns `id`'s results against `enemy`."""
+        with self._lock:
+            i = self._index[id]
+            j = self._index[enemy]
+            wins = float(self._wins[i, j])
+            losses = float(self._wins[j, i])
+            games = float(self._games[i, j])
+            weighted_score_delta = float(self._weighted_score_delta[i, j])
+        return {
+            "wins": int(wins),
+            "losses": int(losses),
+            "games": int(games),
+            "win_rate": wins / games if games > 0 else float("nan"),
+            "weighted_score_delta": weighted_score_delta
+        }
@@ -0,0 +1,238 @@
+from typing import Iterable, Mapping, Tuple
+from email.utils import parsedate_to_datetime
+from threading import Lock
+import os
+import sqlite3
+import time
+
+from merakicommons.ratelimits import RateLimiter
+
+
+class SharedRateLimiter(RateLimiter):
+    """A fixed-window rate limiter whose windows are kept in a SQLite database file.
+
+    Every limiter opened on the same file with the same `name` draws from one budget, whichever process it is in, so
+    worker processes together stay within the API's limits. `limits` is a list of (window seconds, permits per window).
+    """
+    def __init__(self, path: str, limits: Iterable[Tuple[float, int]], name: str = "championgg", timeout: float = 30) -> None:
+        self._path = path
+        self._limits = [tuple(limit) for limit in limits]
+        self._name = name
+        self._timeout = timeout
+        self._lock = Lock()
+        self._connection = None
+        self._pid = None
+        self._permits_issued = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        # A connection can't be used across a fork, so each worker of a pre-forking server opens its own
+        if self._connection is None or self._pid != os.getpid():
+            self._connection = sqlite3.connect(self._path, timeout=self._timeout, check_same_thread=False, isolation_level=None)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("CREATE TABLE IF NOT EXISTS rate_limits (name TEXT NOT NULL, window_seconds REAL NOT NULL, started REAL NOT NULL, issued INTEGER NOT NULL, PRIMARY KEY (name, window_seconds))")
+            self._pid = os.getpid()
+        return self._connection
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    @property
+    def permits_issued(self) -> int:
+        """The number of permits issued by this limiter (not by the other limiters sharing its file)."""
+        return self._permits_issued
+
+    def reset_permits_issued(self) -> None:
+        self._permits_issued = 0
+
+    def _acquire(self) -> float:
+        """Takes a permit from every window if they all have one left and returns 0, or returns how long to wait before trying again."""
+        with self._lock:
+            connection = self._connect()
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                windows = dict((row[0], row[1:]) for row in connection.execute("SELECT window_seconds, started, issued FROM rate_limits WHERE name = ?", (self._name,)))
+                wait = 0.0
+                updated = []
+                for window_seconds, window_permits in self._limits:
+                    started, issued = windows.get(window_seconds, (now, 0))
+                    if started + window_seconds <= now:
+                        started, issued = now, 0
+                    if issued >= window_permits:
+                        wait = max(wait, started + window_seconds - now)
+                    updated.append((self._name, window_seconds, started, issued + 1))
+                if wait == 0.0:
+                    connection.executemany("INSERT OR REPLACE INTO rate_limits (name, window_seconds, started, issued) VALUES (?, ?, ?, ?)", updated)
+                    self._permits_issued += 1
+                connection.execute("COMMIT")
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+        return wait
+
+    def __enter__(self) -> "SharedRateLimiter":
+        while True:
+            wait = self._acquire()
+            if wait == 0.0:
+                return self
+            time.sleep(wait)
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        pass
+
+    def close(self) -> None:
+        with self._lock:
+            if self._connection is not None and self._pid == os.getpid():
+                self._connection.close()
+            self._connection = None
+
+
+# Token buckets slow down by this factor each time champion.gg answers 429 Too Many Requests without saying how long
+# to wait, to no less than MIN_SCALE of their configured rate, and recover by RECOVERY of it per successful response
+BACKOFF = 0.5
+MIN_SCALE = 1 / 16
+RECOVERY = 0.02
+
+
+def _retry_after(value: str) -> float:
+    """The number of seconds a Retry-After header (in seconds or as an HTTP date) says to wait."""
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError, OverflowError):
+        return 0.0
+
+
+def _reset_after(value: str) -> float:
+    """The number of seconds until an X-RateLimit-Reset header's window ends; it's either seconds or a Unix time."""
+    seconds = float(value)
+    if seconds > 10 ** 9:
+        seconds -= time.time()
+    return max(0.0, seconds)
+
+
+class AdaptiveRateLimiter(RateLimiter):
+    """A token-bucket rate limiter that adjusts itself to the rate limit champion.gg reports in its response headers.
+
+    Each of `limits` (window seconds, permits per window) is a bucket holding up to `max_burst` tokens (by default
+    1/50th of the window's permits), refilled at `(permits - max_burst) / seconds` tokens per second, so that no span
+    of `seconds` ever has more than `permits` requests. Requests are spread evenly across the window rather than
+    using it all at once and then stalling until it ends.
+
+    `update` is given the status code and headers of each response. `X-RateLimit-Remaining` and `X-RateLimit-Reset`
+    cap the requests sent until the server's window resets, `Retry-After` holds every request back for as long as it
+    says, and a 429 without one halves the buckets' rates, which then recover as requests succeed.
+    """
+    def __init__(self, limits: Iterable[Tuple[float, int]], max_burst: int = None) -> None:
+        self._lock = Lock()
+        self._buckets = []  # [tokens, capacity, tokens per second]
+        for window_seconds, window_permits in limits:
+            capacity = max_burst if max_burst is not None else max(1, window_permits // 50)
+            capacity = max(1, min(capacity, window_permits))
+            rate = max(window_permits - capacity, 1) / window_seconds
+            self._buckets.append([capacity, capacity, rate])
+        self._scale = 1.0
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._server_remaining = None
+        self._server_reset = 0.0
+        self._in_flight = 0
+        self._permits_issued = 0
+
+    @property
+    def permits_issued(self) -> int:
+        return self._permits_issued
+
+    def reset_permits_issued(self) -> None:
+        self._permits_issued = 0
+
+    @property
+    def scale(self) -> float:
+        """The fraction of the configured rate the buckets currently refill at."""
+        return self._scale
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated
+        self._updated = now
+        for bucket in self._buckets:
+            bucket[0] = min(bucket[1], bucket[0] + elapsed * bucket[2] * self._scale)
+
+    def _acquire(self) -> float:
+        """Takes a token from every bucket if they all have one and returns 0, or returns how long to wait before trying again."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if now < self._paused_until:
+                return self._paused_until - now
+            if self._server_remaining is not None:
+                if now >= self._server_reset:
+                    self._server_remaining = None
+                elif self._server_remaining <= 0:
+                    return self._server_reset - now
+            wait = 0.0
+            for tokens, capacity, rate in self._buckets:
+                if tokens < 1:
+                    wait = max(wait, (1 - tokens) / (rate * self._scale))
+            if wait > 0.0:
+                return wait
+            for bucket in self._buckets:
+                bucket[0] -= 1
+            if self._server_remaining is not None:
+                self._server_remaining -= 1
+            self._in_flight += 1
+            self._permits_issued += 1
+            return 0.0
+
+    def __enter__(self) -> "AdaptiveRateLimiter":
+        while True:
+            wait = self._acquire()
+            if wait == 0.0:
+                return self
+            time.sleep(wait)
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        with self._lock:
+            self._in_flight = max(0, self._in_flight - 1)
+
+    def update(self, status_code: int, response_headers: Mapping[str, str]) -> None:
+        """Adjusts the limiter to a response's status code and rate limit headers. Call it after the request exits the limiter."""
+        headers = {name.lower(): value for name, value in (response_headers or {}).items()}
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if "retry-after" in headers:
+                self._paused_until = max(self._paused_until, now + _retry_after(headers["retry-after"]))
+            elif status_code == 429:
+                self._scale = max(MIN_SCALE, self._scale * BACKOFF)
+                # Start again from empty buckets, so the next request waits for the slower rate
+                for bucket in self._buckets:
+                    bucket[0] = min(bucket[0], 0.0)
+            elif status_code is not None and status_code < 400:
+                self._scale = min(1.0, self._scale + RECOVERY)
+            try:
+                remaining = int(headers["x-ratelimit-remaining"])
+                reset = _reset_after(headers["x-ratelimit-reset"])
+            except (KeyError, ValueError):
+                return
+            # Requests sent since this one have already been counted against what the server says is left
+            self._server_remaining = remaining - self._in_flight
+            self._server_reset = now + reset
+
+
+_key_limiters = {}
+_key_limiters_lock = Lock()
+
+
+def adaptive_rate_limiter(key: str, limits: Iterable[Tuple[float, int]], max_burst: int = None) -> AdaptiveRateLimiter:
+    """Returns the `AdaptiveRateLimiter` for an API key and its limits, so the data sources in a process that use the same key share one."""
+    limits = tuple(tuple(limit) for limit in limits)
+    with _key_limiters_lock:
+        try:
+            return _key_limiters[(key, limits, max_burst)]
+        except KeyError:
+            limiter = _key_limiters[(key, limits, max_burst)] = AdaptiveRateLimiter(limits, max_burst=max_burst)
+            return limiter
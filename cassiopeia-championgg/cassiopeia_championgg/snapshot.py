@@ -0,0 +1,292 @@
+from typing import Any, Dict, Hashable, Iterable, List, Mapping, Set, Tuple
+import mmap
+import numbers
+import struct
+
+import numpy as np
+
+from .dto import ChampionGGStatsListDto, ChampionGGMatchupListDto
+from .table import ChampionGGStatsTable
+
+try:
+    import ujson as json
+except ImportError:
+    import json
+
+MAGIC = b"CGGSNAP1"
+# The magic number, then the offset and length of the manifest
+HEADER = struct.Struct("<8sQQ")
+VERSION = 1
+TYPES = {ChampionGGStatsListDto.__name__: ChampionGGStatsListDto, ChampionGGMatchupListDto.__name__: ChampionGGMatchupListDto}
+# The array type each kind of column is stored as; strings and other values are stored as indexes into a string pool
+_DTYPES = {"bool": "|u1", "int": "<i8", "float": "<f8", "str": "<u4", "json": "<u4"}
+_MISSING = object()
+
+
+def _key(type: type, attributes: Mapping[str, Any]) -> Hashable:
+    """The `ChampionGG` cache key of a snapshot entry."""
+    if type is ChampionGGStatsListDto:
+        return attributes["patch"], attributes["elo"], tuple(attributes["fields"])
+    return attributes["id"], attributes["patch"], attributes["elo"], attributes["role"]
+
+
+def _flatten(value: Any, path: Tuple[str, ...], leaves: Dict[Tuple[str, ...], Any], whole: Set[Tuple[str, ...]]) -> None:
+    if isinstance(value, dict) and value and path not in whole:
+        for name, child in value.items():
+            _flatten(child, path + (name,), leaves, whole)
+    else:
+        leaves[path] = value
+
+
+def _conflicts(paths: Iterable[Tuple[str, ...]]) -> Set[Tuple[str, ...]]:
+    """The paths that are a leaf in some rows and a dict with more fields in others."""
+    paths = set(paths)
+    return {path[:i] for path in paths for i in range(1, len(path)) if path[:i] in paths}
+
+
+def _kind(values: List[Any]) -> str:
+    # Columns are only typed if every value comes back as the same type; ints mixed with floats, and ints too big for
+    # 64 bits, are stored as JSON
+    present = [value for value in values if value is not _MISSING]
+    if all(isinstance(value, bool) for value in present):
+        return "bool"
+    if all(isinstance(value, numbers.Integral) and not isinstance(value, bool) and -2**63 <= value < 2**63 for value in present):
+        return "int"
+    if all(isinstance(value, float) for value in present):
+        return "float"
+    if all(isinstance(value, str) for value in present):
+        return "str"
+    return "json"
+
+
+class _Writer(object):
+    def __init__(self, file) -> None:
+        self._file = file
+        self._offset = HEADER.size
+        file.write(b"\0" * HEADER.size)
+
+    def array(self, array: np.ndarray) -> Dict[str, Any]:
+        padding = -self._offset % 8
+        self._file.write(b"\0" * padding)
+        self._offset += padding
+        array = np.ascontiguousarray(array)
+        self._file.write(array.tobytes())
+        section = {"dtype": array.dtype.str, "offset": self._offset, "count": len(array)}
+        self._offset += array.nbytes
+        return section
+
+    def table(self, rows: List[dict]) -> Dict[str, Any]:
+        """Writes `rows` as one typed column per leaf field, with strings kept in a pool shared by the columns."""
+        # A field that is a dict in some rows but not in others is stored whole, in one JSON column
+        whole = set()
+        while True:
+            leaves = []
+            for row in rows:
+                flat = {}
+                _flatten(row, (), flat, whole)
+                leaves.append(flat)
+            paths = list(dict.fromkeys(path for flat in leaves for path in flat))
+            conflicts = _conflicts(paths)
+            if not conflicts:
+                break
+            whole |= conflicts
+
+        strings = {}
+        columns = []
+        for path in paths:
+            values = [flat.get(path, _MISSING) for flat in leaves]
+            kind = _kind(values)
+            if kind in ("str", "json"):
+                encoded = []
+                for value in values:
+                    if value is _MISSING:
+                        encoded.append(0)
+                        continue
+                    if kind == "json":
+                        value = json.dumps(value)
+                    encoded.append(strings.setdefault(value, len(strings)))
+                values = encoded
+            else:
+                values = [0 if value is _MISSING else value for value in values]
+            column = {"path": list(path), "kind": kind, "values": self.array(np.array(values, dtype=_DTYPES[kind]))}
+            present = np.fromiter((path in flat for flat in leaves), dtype=np.uint8, count=len(leaves))
+            if not present.all():
+                column["present"] = self.array(present)
+            columns.append(column)
+
+        pool = [string.encode("utf-8") for string in strings]
+        offsets = np.zeros(len(pool) + 1, dtype=np.uint64)
+        np.cumsum([len(string) for string in pool], out=offsets[1:])
+        return {
+            "rows": len(rows),
+            "columns": columns,
+            "string_offsets": self.array(offsets),
+            "string_bytes": self.array(np.frombuffer(b"".join(pool), dtype=np.uint8))
+        }
+
+    def finish(self, manifest: Dict[str, Any]) -> None:
+        data = json.dumps(manifest).encode("utf-8")
+        self._file.write(data)
+        self._file.seek(0)
+        self._file.write(HEADER.pack(MAGIC, self._offset, len(data)))
+
+
+def write_snapshot(path: str, entries: Iterable[Tuple[type, Mapping[str, Any]]]) -> int:
+    """Writes champion lists and matchup lists, given as `(type, dto)` pairs, to a snapshot file and returns how many were written.
+
+    Each list's rows are stored as packed typed columns (one per field, with nested fields flattened) rather than
+    as JSON, so a snapshot can be memory-mapped and read back with `Snapshot`.
+    """
+    manifest = {"version": VERSION, "entries": []}
+    with open(path, "wb") as file:
+        writer = _Writer(file)
+        for type, dto in entries:
+            attributes = {name: value for name, value in dto.items() if name != "data"}
+            manifest["entries"].append({"type": type.__name__, "attributes": attributes, "table": writer.table(dto["data"])})
+        writer.finish(manifest)
+    return len(manifest["entries"])
+
+
+class Snapshot(object):
+    """A snapshot file written by `write_snapshot` (or `ChampionGG.export_snapshot`), memory-mapped for reading.
+
+    Nothing is decoded when the file is opened: a list's DTO is only built when it's asked for, and its numeric
+    columns are read straight from the mapped file.
+    """
+    def __init__(self, path: str) -> None:
+        self._path = path
+        with open(path, "rb") as file:
+            self._buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, offset, length = HEADER.unpack_from(self._buffer, 0)
+        if magic != MAGIC:
+            raise ValueError("{} is not a champion.gg snapshot.".format(path))
+        manifest = json.loads(self._buffer[offset:offset + length].decode("utf-8"))
+        if manifest["version"] != VERSION:
+            raise ValueError("{} is a version {} snapshot; only version {} can be read.".format(path, manifest["version"], VERSION))
+        self._entries = {}
+        for entry in manifest["entries"]:
+            type = TYPES[entry["type"]]
+            self._entries[(type, _key(type, entry["attributes"]))] = entry
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    def close(self) -> None:
+        """Unmaps the file; the snapshot can't be read afterwards.
+
+        Arrays returned by `columns` and `table` share the mapped memory, so if any are still in use the file is
+        unmapped once they're gone.
+        """
+        if self._buffer is not None:
+            try:
+                self._buffer.close()
+            except BufferError:
+                pass
+            self._buffer = None
+
+    def __enter__(self) -> "Snapshot":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def keys(self) -> List[Tuple[type, Hashable]]:
+        """The `(type, key)` of every list in the snapshot, keyed the way `ChampionGG` caches them."""
+        return list(self._entries)
+
+    def __contains__(self, key: Tuple[type, Hashable]) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _array(self, section: Mapping[str, Any]) -> np.ndarray:
+        return np.frombuffer(self._buffer, dtype=section["dtype"], count=section["count"], offset=section["offset"])
+
+    def _strings(self, table: Mapping[str, Any]) -> List[str]:
+        offsets = self._array(table["string_offsets"]).tolist()
+        data = self._array(table["string_bytes"])
+        return [data[start:end].tobytes().decode("utf-8") for start, end in zip(offsets, offsets[1:])]
+
+    def columns(self, type: type, key: Hashable) -> Dict[Tuple[str, ...], np.ndarray]:
+        """Returns a list's numeric and boolean columns, keyed by field path, as arrays backed by the mapped file.
+
+        Values are 0 for rows that don't have the field.
+        """
+        table = self._entries[(type, key)]["table"]
+        return {tuple(column["path"]): self._array(column["values"]) for column in table["columns"] if column["kind"] in ("bool", "int", "float")}
+
+    def _rows(self, table: Mapping[str, Any]) -> List[dict]:
+        strings = None
+        columns = []
+        for column in table["columns"]:
+            values = self._array(column["values"]).tolist()
+            kind = column["kind"]
+            present = self._array(column["present"]).tolist() if "present" in column else None
+            if kind in ("str", "json"):
+                if strings is None:
+                    strings = self._strings(table)
+                values = [strings[value] for value in values]
+                if kind == "json":
+                    # Rows without the field have a placeholder that isn't JSON
+                    values = [json.loads(value) if present is None or present[i] else None for i, value in enumerate(values)]
+            elif kind == "bool":
+                values = [bool(value) for value in values]
+            columns.append((column["path"], values, present))
+
+        rows = []
+        for i in range(table["rows"]):
+            row = {}
+            for path, values, present in columns:
+                if present is not None and not present[i]:
+                    continue
+                parent = row
+                for name in path[:-1]:
+                    parent = parent.setdefault(name, {})
+                parent[path[-1]] = values[i]
+            rows.append(row)
+        return rows
+
+    def get(self, type: type, key: Hashable) -> Any:
+        """Builds the list stored under `key` as a `type` DTO, or raises a KeyError if it isn't in the snapshot."""
+        entry = self._entries[(type, key)]
+        data = dict(entry["attributes"])
+        data["data"] = self._rows(entry["table"])
+        return type(data)
+
+    def table(self, patch: str, elo: str, fields: Iterable[str]) -> ChampionGGStatsTable:
+        """Returns a champion list as a `ChampionGGStatsTable` built directly from its columns, without building its DTO."""
+        key = (patch, elo, tuple(fields))
+        entry = self._entries[(ChampionGGStatsListDto, key)]
+        table = entry["table"]
+        columns = {}
+        strings = None
+        for column in table["columns"]:
+            if len(column["path"]) != 1:
+                continue
+            name = column["path"][0]
+            values = self._array(column["values"])
+            if name == "championId":
+                columns[name] = values
+            elif name == "role":
+                if strings is None:
+                    strings = self._strings(table)
+                columns[name] = np.array([strings[value] for value in values.tolist()], dtype=str)
+            elif column["kind"] in ("int", "float"):
+                values = values.astype(np.float64)
+                if "present" in column:
+                    values[self._array(column["present"]) == 0] = np.nan
+                columns[name] = values
+            elif column["kind"] == "json":
+                # A field mixing ints and floats is a JSON column, but `ChampionGGStatsTable.from_dto` makes it a float one
+                if strings is None:
+                    strings = self._strings(table)
+                present = self._array(column["present"]).tolist() if "present" in column else [1] * len(values)
+                decoded = [json.loads(strings[value]) if present[i] else None for i, value in enumerate(values.tolist())]
+                if any(isinstance(value, numbers.Real) and not isinstance(value, bool) for value in decoded) and \
+                        all(value is None or (isinstance(value, numbers.Real) and not isinstance(value, bool)) for value in decoded):
+                    columns[name] = np.array([np.nan if value is None else value for value in decoded], dtype=np.float64)
+        # Match `ChampionGGStatsTable.from_dto`, which puts the id and role columns first (and has them for an empty list)
+        columns = dict([("championId", columns.pop("championId", np.zeros(0, dtype=np.int64))), ("role", columns.pop("role", np.array([], dtype=str)))] + list(columns.items()))
+        return ChampionGGStatsTable(columns, patch=patch, elo=elo)
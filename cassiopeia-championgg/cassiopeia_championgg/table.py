@@ -0,0 +1,193 @@
+from typing import Dict, Iterator, List, Mapping, Union
+from enum import Enum
+import numbers
+
+import numpy as np
+
+from .dto import ChampionGGStatsListDto
+from .data import Role
+
+
+class ChampionGGStatsTable(object):
+    """A columnar view of a champion.gg champion list, with one NumPy array per numeric field.
+
+    Every numeric field in the list becomes a float64 column (NaN where a row doesn't have the field), alongside the
+    integer `championId` and string `role` columns. Filtering, sorting, and top-k queries operate on whole columns:
+
+        junglers = table.filter(table["playRate"] > 0.02, role=Role.jungle)
+        junglers.top(10, "winRate")
+    """
+    def __init__(self, columns: Mapping[str, np.ndarray], patch: str = None, elo: str = None) -> None:
+        self._columns = dict(columns)
+        self._patch = patch
+        self._elo = elo
+
+    @classmethod
+    def from_dto(cls, ggs: ChampionGGStatsListDto) -> "ChampionGGStatsTable":
+        rows = ggs["data"]
+        fields = []
+        for row in rows:
+            for field, value in row.items():
+                if field not in fields and field != "championId" and isinstance(value, numbers.Real) and not isinstance(value, bool):
+                    fields.append(field)
+        columns = {
+            "championId": np.fromiter((row["championId"] for row in rows), dtype=np.int64, count=len(rows)),
+            "role": np.array([row["role"] for row in rows], dtype=str)
+        }
+        for field in fields:
+            columns[field] = np.fromiter((row.get(field, np.nan) for row in rows), dtype=np.float64, count=len(rows))
+        return cls(columns, patch=ggs.get("patch", None), elo=ggs.get("elo", None))
+
+    @property
+    def patch(self) -> str:
+        return self._patch
+
+    @property
+    def elo(self) -> str:
+        return self._elo
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self._columns)
+
+    def __len__(self) -> int:
+        return len(self._columns["championId"])
+
+    def __getitem__(self, column: str) -> np.ndarray:
+        return self._columns[column]
+
+    def __contains__(self, column: str) -> bool:
+        return column in self._columns
+
+    def take(self, indices: np.ndarray) -> "ChampionGGStatsTable":
+        """Returns a table with the rows at `indices` (or where the boolean mask `indices` is true), in that order."""
+        return ChampionGGStatsTable({name: column[indices] for name, column in self._columns.items()}, patch=self._patch, elo=self._elo)
+
+    def filter(self, mask: np.ndarray = None, *, role: Union[Role, str] = None) -> "ChampionGGStatsTable":
+        """Returns the rows where the boolean array `mask` is true and, if given, the role matches."""
+        if mask is None:
+            mask = np.ones(len(self), dtype=bool)
+        if role is not None:
+            if isinstance(role, Enum):
+                role = role.value
+            mask = mask & (self._columns["role"] == role)
+        return self.take(mask)
+
+    def sort(self, by: str, descending: bool = True) -> "ChampionGGStatsTable":
+        """Returns the rows sorted by the column `by`. Rows missing a value are always placed last."""
+        column = self._columns[by]
+        order = np.argsort(-column if descending else column, kind="stable")
+        return self.take(order)
+
+    def top(self, k: int, by: str, descending: bool = True) -> "ChampionGGStatsTable":
+        """Returns the `k` rows with the highest (or lowest) values in the column `by`, in order."""
+        column = self._columns[by]
+        keys = -column if descending else column
+        if k < len(keys):
+            candidates = np.argpartition(keys, k - 1)[:k]
+        else:
+            candidates = np.arange(len(keys))
+        order = candidates[np.argsort(keys[candidates], kind="stable")]
+        return self.take(order)
+
+    def to_dicts(self) -> Iterator[Dict[str, Union[int, float, str]]]:
+        names = list(self._columns)
+        for values in zip(*(self._columns[name].tolist() for name in names)):
+            yield dict(zip(names, values))
+
+
+class ChampionGGEloTable(object):
+    """champion.gg champion lists for several elos, aligned by `(championId, role)`.
+
+    Rows are the union of the champions and roles in every elo's list. `values(field)` returns a 2D array with a
+    column per elo (in the order of `elos`), NaN where a champion doesn't have the role in that elo. `tier(elo)` is one
+    elo's list as a `ChampionGGStatsTable` aligned to the same rows.
+
+    `aggregate` is a `ChampionGGStatsTable` combining the elos: `gamesPlayed` is summed, and every other field is
+    averaged over the elos that have it, weighted by their games played (or equally, if there is no `gamesPlayed`
+    column), so it can be filtered and ranked like a single list:
+
+        table.aggregate.filter(role=Role.jungle).top(10, "winRate")
+    """
+    def __init__(self, champion_ids: np.ndarray, roles: np.ndarray, values: Mapping[str, np.ndarray], elos: List[str], patch: str = None) -> None:
+        self._champion_ids = champion_ids
+        self._roles = roles
+        self._values = dict(values)
+        self._elos = list(elos)
+        self._patch = patch
+        self._aggregate = self._combine()
+
+    @classmethod
+    def from_tables(cls, tables: Mapping[str, ChampionGGStatsTable]) -> "ChampionGGEloTable":
+        """Aligns one `ChampionGGStatsTable` per elo, keyed by elo."""
+        elos = list(tables)
+        keys = {}
+        fields = []
+        for table in tables.values():
+            for key in zip(table["championId"].tolist(), table["role"].tolist()):
+                keys.setdefault(key, len(keys))
+            fields.extend(name for name in table.columns if name not in ("championId", "role") and name not in fields)
+
+        values = {field: np.full((len(keys), len(elos)), np.nan) for field in fields}
+        for j, table in enumerate(tables.values()):
+            rows = np.fromiter((keys[key] for key in zip(table["championId"].tolist(), table["role"].tolist())), dtype=np.int64, count=len(table))
+            for field in table.columns:
+                if field in values:
+                    values[field][rows, j] = table[field]
+
+        champion_ids = np.fromiter((id for id, role in keys), dtype=np.int64, count=len(keys))
+        roles = np.array([role for id, role in keys], dtype=str)
+        patches = {table.patch for table in tables.values()}
+        return cls(champion_ids, roles, values, elos, patch=patches.pop() if len(patches) == 1 else None)
+
+    def _combine(self) -> ChampionGGStatsTable:
+        games = self._values.get("gamesPlayed", None)
+        weights = np.ones((len(self._champion_ids), len(self._elos))) if games is None else np.nan_to_num(games)
+        columns = {"championId": self._champion_ids, "role": self._roles}
+        for field, values in self._values.items():
+            present = ~np.isnan(values)
+            if field == "gamesPlayed":
+                columns[field] = np.where(present.any(axis=1), np.nansum(values, axis=1), np.nan)
+                continue
+            total = np.where(present, weights, 0).sum(axis=1)
+            weighted = np.where(present, weights * np.nan_to_num(values), 0).sum(axis=1)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                columns[field] = np.where(total > 0, weighted / total, np.nan)
+        return ChampionGGStatsTable(columns, patch=self._patch, elo="_".join(self._elos))
+
+    @property
+    def patch(self) -> str:
+        return self._patch
+
+    @property
+    def elos(self) -> List[str]:
+        return list(self._elos)
+
+    @property
+    def fields(self) -> List[str]:
+        return list(self._values)
+
+    @property
+    def champion_ids(self) -> np.ndarray:
+        return self._champion_ids
+
+    @property
+    def roles(self) -> np.ndarray:
+        return self._roles
+
+    def __len__(self) -> int:
+        return len(self._champion_ids)
+
+    def values(self, field: str) -> np.ndarray:
+        """Returns `field` for every row and elo, as an array of shape `(len(table), len(elos))`."""
+        return self._values[field]
+
+    def tier(self, elo: str) -> ChampionGGStatsTable:
+        j = self._elos.index(elo)
+        columns = {"championId": self._champion_ids, "role": self._roles}
+        columns.update((field, values[:, j]) for field, values in self._values.items())
+        return ChampionGGStatsTable(columns, patch=self._patch, elo=elo)
+
+    @property
+    def aggregate(self) -> ChampionGGStatsTable:
+        return self._aggregate
@@ -1,10 +1,10 @@
-from typing import Type, TypeVar, List
-from collections import defaultdict
+from typing import Type, TypeVar, Iterator, List
 
 from datapipelines import DataTransformer, PipelineContext
 
 from .core import ChampionGGStatsData, ChampionGGStatsListData, ChampionGGMatchupData, ChampionGGMatchupListData, ChampionGGMatchups, ChampionGGMatchup, MultipleChampionGGStatsData, MultipleChampionGGStats
 from .dto import ChampionGGStatsDto, ChampionGGStatsListDto, ChampionGGMatchupDto, ChampionGGMatchupListDto, MultipleChampionGGStatsDto
+from .instrumentation import metrics
 
 T = TypeVar("T")
 F = TypeVar("F")
@@ -23,34 +23,23 @@ class ChampionGGTransformer(DataTransformer):
         return ChampionGGStatsData(**data)
 
     @transform.register(MultipleChampionGGStatsDto, MultipleChampionGGStatsData)
+    @metrics.timed("transform.muliple_champion_gg_dto_to_data")
     def muliple_champion_gg_dto_to_data(self, value: MultipleChampionGGStatsDto, context: PipelineContext = None) -> MultipleChampionGGStatsData:
         data = value  # data = deepcopy(value)
         return MultipleChampionGGStatsData([ChampionGGTransformer.champion_gg_dto_to_data(None, gg) for gg in data["data"]], id=data["championId"])
 
     @transform.register(ChampionGGStatsListDto, ChampionGGStatsListData)
+    @metrics.timed("transform.champion_gg_list_dto_to_data")
     def champion_gg_list_dto_to_data(self, value: ChampionGGStatsListDto, context: PipelineContext = None) -> ChampionGGStatsListData:
-        raise NotImplemented  # See functionality in datastores.py
         data = value  # data = deepcopy(value)
-        reformatted =  defaultdict(list)
+        # One pass over the rows groups each champion's roles together, in the order the champions first appear
+        by_champion = {}
         for item in data["data"]:
-            reformatted[item["championId"]].append(item)
-
-        def transform_many_roles_per_champion_to_one_champion(ggs):
-            # This function is also in .datastores
-            reformatted = defaultdict(dict)
-            reformatted["championId"] = ggs[0]["championId"]
-            reformatted["elo"] = ggs[0]["elo"]
-            reformatted["patch"] = ggs[0]["patch"]
-            for data in ggs:
-                role = data["role"]
-                for field in data.keys():
-                    if field in ["championId", "elo", "patch", "role"]:
-                        continue
-                    reformatted[field][role] = data[field]  # deepcopy(data[field])
-            return reformatted
-
-        data = [self.champion_gg_dto_to_data(transform_many_roles_per_champion_to_one_champion(item)) for item in reformatted.values()]
-        return ChampionGGStatsListData(data)
+            by_champion.setdefault(item["championId"], []).append(ChampionGGStatsData(**item))
+        return ChampionGGStatsListData([MultipleChampionGGStatsData(ggs, id=id) for id, ggs in by_champion.items()],
+                                       patch=data.get("patch", None),
+                                       elo=data.get("elo", None),
+                                       fields=data.get("fields", None))
 
     @transform.register(ChampionGGMatchupDto, ChampionGGMatchupData)
     def championgg_matchup_dto_to_data(self, value: ChampionGGMatchupDto, context: PipelineContext = None) -> ChampionGGMatchupData:
@@ -58,9 +47,11 @@ class ChampionGGTransformer(DataTransformer):
         return ChampionGGMatchupData(**data)
 
     @transform.register(ChampionGGMatchupListDto, ChampionGGMatchupListData)
+    @metrics.timed("transform.championgg_matchup_list_dto_to_data")
     def championgg_matchup_list_dto_to_data(self, value: ChampionGGMatchupListDto, context: PipelineContext = None) -> ChampionGGMatchupListData:
         data = value
-        result = ChampionGGMatchupListData([self.championgg_matchup_dto_to_data(d) for d in data["data"]],
+        # ChampionGGMatchupListData builds each matchup's data from its dto when it's read
+        result = ChampionGGMatchupListData(data["data"],
                                            patch=data["patch"],
                                            elo=data["elo"],
                                            id=data["id"],
@@ -78,16 +69,16 @@ class ChampionGGTransformer(DataTransformer):
         return result
 
     @transform.register(ChampionGGMatchupListData, ChampionGGMatchups)
+    @metrics.timed("transform.championgg_matchups_data_to_core")
     def championgg_matchups_data_to_core(self, value: ChampionGGMatchupListData, context: PipelineContext = None) -> ChampionGGMatchups:
         data = value  # data = deepcopy(value)
         result = ChampionGGMatchups.from_data(id=data.id, role=data.role, patch=data.patch)
-        from collections import Counter
-        ids = Counter()
-        for d in data:
-            ids[d.champ1_id] += 1
-            ids[d.champ2_id] += 1
-        correct_champion_id = ids.most_common(1)[0][0]
-        result._generator = iter([ChampionGGTransformer.championgg_matchup_data_to_core(self, d, correct_champion_id=correct_champion_id) for d in data])
-        for matchup in result:
-            assert matchup.me.champion.id == correct_champion_id
+        result._generator = ChampionGGTransformer._matchups_to_core(self, data)
         return result
+
+    def _matchups_to_core(self, data: ChampionGGMatchupListData) -> Iterator[ChampionGGMatchup]:
+        # The matchups were requested for champion `data.id`, so that champion is "me" in every one of them
+        for matchup in data:
+            if data.id != matchup.champ1_id and data.id != matchup.champ2_id:
+                raise ValueError("Champion {}'s matchups include a matchup between champions {} and {}".format(data.id, matchup.champ1_id, matchup.champ2_id))
+            yield ChampionGGTransformer.championgg_matchup_data_to_core(self, matchup, correct_champion_id=data.id)